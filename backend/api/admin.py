@@ -3,11 +3,18 @@ from .models import (
     ParkingFacility,
     ParkingZone,
     Device,
+    DeviceLastSeen,
+    DeviceOccupancy,
     Telemetry,
     ParkingLog,
+    ParkingHourlyRollup,
+    ParkingSession,
+    ParkingSessionCursor,
+    ZoneOccupancy,
     Alert,
     Target,
     DeviceHealthScore,
+    ReportJob,
 )
 
 
@@ -29,6 +36,24 @@ class DeviceAdmin(admin.ModelAdmin):
     search_fields = ("code",)
 
 
+@admin.register(DeviceLastSeen)
+class DeviceLastSeenAdmin(admin.ModelAdmin):
+    list_display = ("device", "last_telemetry_at", "last_parking_log_at", "updated_at", "change_version")
+    search_fields = ("device__code",)
+
+
+@admin.register(DeviceOccupancy)
+class DeviceOccupancyAdmin(admin.ModelAdmin):
+    list_display = ("device", "is_occupied", "since", "last_event_at")
+    list_filter = ("is_occupied", "device__zone")
+    search_fields = ("device__code",)
+
+
+@admin.register(ZoneOccupancy)
+class ZoneOccupancyAdmin(admin.ModelAdmin):
+    list_display = ("zone", "occupied", "slot_count", "updated_at")
+
+
 @admin.register(Telemetry)
 class TelemetryAdmin(admin.ModelAdmin):
     list_display = ("device", "voltage", "current", "power_factor", "timestamp")
@@ -43,6 +68,26 @@ class ParkingLogAdmin(admin.ModelAdmin):
     date_hierarchy = "timestamp"
 
 
+@admin.register(ParkingHourlyRollup)
+class ParkingHourlyRollupAdmin(admin.ModelAdmin):
+    list_display = ("device", "hour", "event_count", "occupied_count", "occupied_seconds")
+    list_filter = ("device__zone",)
+    date_hierarchy = "hour"
+
+
+@admin.register(ParkingSession)
+class ParkingSessionAdmin(admin.ModelAdmin):
+    list_display = ("device", "start", "end", "duration_seconds")
+    list_filter = ("device__zone",)
+    date_hierarchy = "start"
+
+
+@admin.register(ParkingSessionCursor)
+class ParkingSessionCursorAdmin(admin.ModelAdmin):
+    list_display = ("device", "last_log_id", "last_event_at", "open_since")
+    search_fields = ("device__code",)
+
+
 @admin.register(Alert)
 class AlertAdmin(admin.ModelAdmin):
     list_display = ("device", "severity", "alert_type", "message", "acknowledged_at", "created_at")
@@ -60,3 +105,9 @@ class TargetAdmin(admin.ModelAdmin):
 class DeviceHealthScoreAdmin(admin.ModelAdmin):
     list_display = ("device", "score", "calculated_at")
     date_hierarchy = "calculated_at"
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "format", "status", "rows_done", "rows_total", "size", "created_at", "expires_at")
+    list_filter = ("status", "format")
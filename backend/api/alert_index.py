@@ -0,0 +1,69 @@
+"""
+In-process index of open (unacknowledged) alerts as (device_id, alert_type) pairs.
+
+Lets the hot ingestion paths skip the "is there an open alert?" query and the
+no-op offline-acknowledge UPDATE when nothing is open, which is the usual case.
+Loaded on first use, kept current by the alert helpers in services.py and by
+post_save/post_delete on Alert, and reloaded every OPEN_ALERT_INDEX_RECONCILE_SECONDS
+so alerts created or acknowledged by other processes (other workers, the offline
+monitor) are picked up. Between reloads it can lag other processes by that long.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+
+class OpenAlertIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pairs = None
+        self._loaded_at = 0.0
+
+    def _interval(self):
+        return getattr(settings, "OPEN_ALERT_INDEX_RECONCILE_SECONDS", 5)
+
+    def _snapshot(self):
+        pairs = self._pairs
+        if pairs is not None and time.monotonic() - self._loaded_at < self._interval():
+            return pairs
+        return self.reconcile()
+
+    def reconcile(self):
+        """Reload the open pairs from the database (one query on the open-alert index)."""
+        from .models import Alert
+
+        pairs = set(
+            Alert.objects.filter(acknowledged_at__isnull=True)
+            .exclude(device_id=None)
+            .values_list("device_id", "alert_type")
+        )
+        with self._lock:
+            self._pairs = pairs
+            self._loaded_at = time.monotonic()
+        return pairs
+
+    def has(self, device_id, alert_type):
+        return (device_id, alert_type) in self._snapshot()
+
+    def devices_with(self, device_ids, alert_type):
+        """Subset of device_ids with an open alert of alert_type."""
+        pairs = self._snapshot()
+        return {d for d in device_ids if (d, alert_type) in pairs}
+
+    def add(self, pairs):
+        with self._lock:
+            if self._pairs is not None:
+                self._pairs.update(pairs)
+
+    def discard(self, pairs):
+        with self._lock:
+            if self._pairs is not None:
+                self._pairs.difference_update(pairs)
+
+    def invalidate(self):
+        with self._lock:
+            self._pairs = None
+
+
+open_alerts = OpenAlertIndex()
@@ -0,0 +1,208 @@
+"""
+Range analytics for the dashboard and /api/analytics/: grouped queries over a date
+range, one per series, never one query per day or per device.
+"""
+from datetime import date, datetime, timedelta
+
+from django.db import connection
+from django.db.models import Avg, Count, Q, Sum
+from django.db.models.functions import ExtractHour, TruncDate, TruncHour
+from django.utils import timezone
+
+from .models import Alert, Device, ParkingHourlyRollup, ParkingSession, ParkingZone, Telemetry
+
+
+def _day_bounds(date_from, date_to):
+    start = timezone.make_aware(datetime.combine(date_from, datetime.min.time()))
+    end = timezone.make_aware(datetime.combine(date_to, datetime.max.time()))
+    return start, end
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _as_hour(value):
+    """(date, hour of day) of a truncated-hour value, as returned by a raw cursor."""
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date(), value.hour
+
+
+def _active_devices(trunc, start, end, scope):
+    """
+    {bucket: distinct devices with telemetry or parking events} for trunc (TruncDate or
+    TruncHour). The two sources are UNIONed and counted in the database, so only one
+    row per bucket comes back however many devices and readings there are.
+    """
+    telemetry = (
+        Telemetry.objects.filter(timestamp__gte=start, timestamp__lte=end, **scope)
+        .annotate(bucket=trunc("timestamp"))
+        .order_by()
+        .values("device_id", "bucket")
+    )
+    logs = (
+        ParkingHourlyRollup.objects.filter(hour__gte=start, hour__lte=end, event_count__gt=0, **scope)
+        .annotate(bucket=trunc("hour"))
+        .order_by()
+        .values("device_id", "bucket")
+    )
+    sql, params = telemetry.union(logs).query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT bucket, COUNT(*) FROM ({sql}) active GROUP BY bucket", params
+        )
+        return cursor.fetchall()
+
+
+def dashboard_trend(date_from, date_to, scope):
+    """
+    Per-day and per-hour-of-day series for [date_from, date_to]. scope: device filter
+    kwargs (facility / zone). Hour-of-day values are totals over the range, except
+    active_devices, which is the average per day.
+    """
+    start, end = _day_bounds(date_from, date_to)
+    n_days = (date_to - date_from).days + 1
+    rollups = ParkingHourlyRollup.objects.filter(hour__gte=start, hour__lte=end, **scope)
+    alerts = Alert.objects.filter(created_at__gte=start, created_at__lte=end, **scope)
+    sums = {
+        "events": Sum("event_count"),
+        "occupied_events": Sum("occupied_count"),
+        "occupied_seconds": Sum("occupied_seconds"),
+    }
+
+    daily = {}
+    d = date_from
+    while d <= date_to:
+        daily[d] = {"events": 0, "occupied_events": 0, "occupied_seconds": 0.0, "active_devices": 0, "alerts": 0}
+        d += timedelta(days=1)
+    hourly = {
+        h: {"events": 0, "occupied_events": 0, "occupied_seconds": 0.0, "active_devices": 0, "alerts": 0}
+        for h in range(24)
+    }
+
+    for row in rollups.annotate(day=TruncDate("hour")).values("day").annotate(**sums):
+        daily[_as_date(row["day"])].update({k: row[k] or 0 for k in sums})
+    for row in rollups.annotate(h=ExtractHour("hour")).values("h").annotate(**sums):
+        hourly[row["h"]].update({k: row[k] or 0 for k in sums})
+    for row in alerts.annotate(day=TruncDate("created_at")).values("day").annotate(n=Count("id")):
+        daily[_as_date(row["day"])]["alerts"] = row["n"]
+    for row in alerts.annotate(h=ExtractHour("created_at")).values("h").annotate(n=Count("id")):
+        hourly[row["h"]]["alerts"] = row["n"]
+    for bucket, n in _active_devices(TruncDate, start, end, scope):
+        daily[_as_date(bucket)]["active_devices"] = n
+    for bucket, n in _active_devices(TruncHour, start, end, scope):
+        hourly[_as_hour(bucket)[1]]["active_devices"] += n
+
+    slot_count = Device.objects.filter(**{k.removeprefix("device__"): v for k, v in scope.items()}).count()
+
+    def finish(series, period_seconds):
+        seconds = series.pop("occupied_seconds")
+        series["occupied_hours"] = round(seconds / 3600, 2)
+        capacity = slot_count * period_seconds
+        series["utilisation_pct"] = round(seconds / capacity * 100, 1) if capacity else None
+        return series
+
+    return {
+        "slot_count": slot_count,
+        "daily": [{"date": d.isoformat(), **finish(s, 86400)} for d, s in daily.items()],
+        "hour_of_day": [
+            {
+                "hour": h,
+                **finish(s, 3600 * n_days),
+                "active_devices": round(s["active_devices"] / n_days, 1),
+            }
+            for h, s in hourly.items()
+        ],
+    }
+
+
+# Dwell-time histogram bucket edges, in minutes
+DWELL_BUCKETS = [15, 30, 60, 120, 240, 480, 1440]
+
+
+def _minutes(seconds):
+    return round(seconds / 60, 1) if seconds is not None else None
+
+
+def session_stats(date_from, date_to, scope):
+    """
+    Dwell time distribution, turnover per slot and utilisation per zone for sessions
+    starting in [date_from, date_to]. scope: device filter kwargs (facility / zone).
+    Sessions come from refresh_parking_sessions; utilisation counts each session's
+    full duration on its start day.
+    """
+    start, end = _day_bounds(date_from, date_to)
+    n_days = (date_to - date_from).days + 1
+    sessions = ParkingSession.objects.filter(start__gte=start, start__lte=end, **scope)
+
+    edges = [0] + DWELL_BUCKETS + [None]
+    buckets = {}
+    for i, (lo, hi) in enumerate(zip(edges, edges[1:])):
+        cond = Q(duration_seconds__gte=lo * 60)
+        if hi is not None:
+            cond &= Q(duration_seconds__lt=hi * 60)
+        buckets[f"b{i}"] = Count("id", filter=cond)
+    totals = sessions.aggregate(n=Count("id"), avg=Avg("duration_seconds"), **buckets)
+    n = totals["n"]
+
+    def percentile(p):
+        if not n:
+            return None
+        index = min(n - 1, int(p / 100 * n))
+        return sessions.order_by("duration_seconds").values_list("duration_seconds", flat=True)[index]
+
+    histogram = [
+        {"min_minutes": lo, "max_minutes": hi, "count": totals[f"b{i}"]}
+        for i, (lo, hi) in enumerate(zip(edges, edges[1:]))
+    ]
+
+    device_scope = {k.removeprefix("device__"): v for k, v in scope.items()}
+    zone_slots = dict(
+        Device.objects.filter(**device_scope)
+        .values("zone_id")
+        .annotate(n=Count("id"))
+        .values_list("zone_id", "n")
+    )
+    per_zone = {
+        row["device__zone_id"]: row
+        for row in sessions.values("device__zone_id").annotate(
+            n=Count("id"), seconds=Sum("duration_seconds"), avg=Avg("duration_seconds")
+        )
+    }
+    zones = []
+    for zone in (
+        ParkingZone.objects.filter(id__in=zone_slots.keys() | per_zone.keys())
+        .select_related("facility")
+        .order_by("facility__name", "code")
+    ):
+        slots = zone_slots.get(zone.id, 0)
+        row = per_zone.get(zone.id, {"n": 0, "seconds": 0, "avg": None})
+        zones.append({
+            "zone_id": zone.id,
+            "zone_code": zone.code,
+            "facility_id": zone.facility_id,
+            "facility_name": zone.facility.name,
+            "slot_count": slots,
+            "sessions": row["n"],
+            "turnover_per_slot_per_day": round(row["n"] / slots / n_days, 2) if slots else None,
+            "avg_dwell_minutes": _minutes(row["avg"]),
+            "utilisation_pct": (
+                round((row["seconds"] or 0) / (slots * n_days * 86400) * 100, 1) if slots else None
+            ),
+        })
+
+    return {
+        "sessions": n,
+        "avg_dwell_minutes": _minutes(totals["avg"]),
+        "median_dwell_minutes": _minutes(percentile(50)),
+        "p90_dwell_minutes": _minutes(percentile(90)),
+        "dwell_histogram": histogram,
+        "zones": zones,
+    }
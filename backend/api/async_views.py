@@ -0,0 +1,88 @@
+"""
+Async ingestion views for the ASGI entry point (config/asgi.py).
+
+Same validation, responses and status codes as the DRF views in views.py, which
+share their core with these. Under ASGI a waiting request holds only a coroutine:
+database work runs on a small dedicated thread pool (ASYNC_DB_THREADS), so one
+process can keep many slow device connections open without a worker thread each.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from . import push, views
+
+_db_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "ASYNC_DB_THREADS", 1),
+    thread_name_prefix="async-db",
+)
+
+
+def _in_db_thread(func, *args):
+    close_old_connections()
+    return func(*args)
+
+
+async def _run(func, request):
+    """Parse the JSON body, run func(payload) on the DB pool, return its (body, status) as JSON."""
+    try:
+        payload = json.loads(request.body)
+    except ValueError as e:
+        return JsonResponse({"detail": f"JSON parse error - {e}"}, status=400)
+    body, code = await sync_to_async(
+        _in_db_thread, thread_sensitive=False, executor=_db_executor
+    )(func, payload)
+    return JsonResponse(body, status=code, safe=False)
+
+
+@csrf_exempt
+@require_POST
+async def telemetry_create(request):
+    """POST /api/async/telemetry/ - async variant of /api/telemetry/."""
+    return await _run(views._telemetry_create, request)
+
+
+@csrf_exempt
+@require_POST
+async def telemetry_bulk_create(request):
+    """POST /api/async/telemetry/bulk/ - async variant of /api/telemetry/bulk/."""
+    return await _run(views._telemetry_bulk_create, request)
+
+
+@csrf_exempt
+@require_POST
+async def parking_log_create(request):
+    """POST /api/async/parking-log/ - async variant of /api/parking-log/."""
+    return await _run(views._parking_log_create, request)
+
+
+@require_GET
+async def event_stream(request):
+    """
+    GET /api/events/?facility=...&zone=...&severity=... - server-sent events (api/push.py).
+    Needs the ASGI entry point; under WSGI (e.g. runserver) it answers 501 and clients poll.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "Event stream needs the ASGI server (config.asgi:application)."}, status=501
+        )
+    filters = {}
+    for param, key in (("facility", "facility_id"), ("zone", "zone_id")):
+        value = request.GET.get(param)
+        if value:
+            try:
+                filters[key] = int(value)
+            except ValueError:
+                return JsonResponse({"detail": f"Invalid {param} id."}, status=400)
+    subscriber = push.Subscriber(severity=request.GET.get("severity") or None, **filters)
+    response = StreamingHttpResponse(push.stream(subscriber), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # no proxy buffering (nginx)
+    return response
@@ -0,0 +1,66 @@
+"""
+Cache for dashboard summaries of closed days (settings.DASHBOARD_CACHE_ALIAS).
+
+Every day has a version in the cache: the time (ns) data in that day last changed,
+as far as this cache knows. Summary entries are keyed by day, facility/zone filter
+and that version, so writes into a day (parking logs, telemetry, targets) retire
+its entries by moving the version; other days stay cached. Versions move after the
+writing transaction commits, so a reader can never cache pre-commit data under
+the new version. The version also gives Last-Modified, and the ETag is derived from it.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+
+def _cache():
+    return caches[getattr(settings, "DASHBOARD_CACHE_ALIAS", "default")]
+
+
+def _version_key(day):
+    return f"dashboard:version:{day.isoformat()}"
+
+
+def day_version(day):
+    """Current version of a day, starting one if the cache has none."""
+    cache = _cache()
+    key = _version_key(day)
+    cache.add(key, time.time_ns(), None)
+    return cache.get(key) or time.time_ns()
+
+
+def touch_timestamps(timestamps):
+    """touch_days() for the local days the timestamps fall on."""
+    touch_days({timezone.localtime(ts).date() for ts in timestamps})
+
+
+def touch_days(days):
+    """Move the version of each day once the current transaction commits."""
+    days = set(days)
+    if not days:
+        return
+    transaction.on_commit(
+        lambda: _cache().set_many({_version_key(day): time.time_ns() for day in days}, None)
+    )
+
+
+def cached_summary(day, scope, compute):
+    """
+    Return (body, etag, last_modified) for a closed day, computing and storing it on a miss.
+    scope: hashable facility/zone filter that is part of the key.
+    """
+    version = day_version(day)
+    digest = hashlib.sha1(repr((day.isoformat(), scope, version)).encode()).hexdigest()[:20]
+    key = f"dashboard:summary:{digest}"
+    cache = _cache()
+    body = cache.get(key)
+    if body is None:
+        body = compute()
+        cache.set(key, body, getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 24 * 60 * 60))
+    last_modified = datetime.fromtimestamp(version / 1e9, tz=dt_timezone.utc)
+    return body, f'"{digest}"', last_modified
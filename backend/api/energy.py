@@ -0,0 +1,184 @@
+"""
+Energy and power analytics over telemetry: real power P = V * I * PF per reading,
+energy by trapezoidal integration of P over time, peak / average power and power
+factor statistics per device, zone and facility.
+
+Readings are streamed as (device, timestamp, V, I, PF) columns ordered by device
+then time, in chunks of ENERGY_CHUNK_SIZE rows, and each chunk is reduced with
+NumPy (pure Python when it is not installed). Gaps longer than ENERGY_MAX_GAP_SECONDS
+(e.g. a device that was offline) add no energy. Only readings inside the range
+count, so the interval before the first reading of the range is not included.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+
+from .models import Device, Telemetry
+
+try:
+    import numpy as np
+except ImportError:  # optional; pure-Python fallback below
+    np = None
+
+
+def _settings():
+    return (
+        getattr(settings, "ENERGY_CHUNK_SIZE", 50000),
+        getattr(settings, "ENERGY_MAX_GAP_SECONDS", 300),
+    )
+
+
+_FIELDS = ("readings", "energy_wh", "power_sum", "peak_power_w", "pf_sum", "pf_min")
+
+
+def _totals():
+    return {
+        "readings": 0,
+        "energy_wh": 0.0,
+        "power_sum": 0.0,
+        "peak_power_w": None,
+        "pf_sum": 0.0,
+        "pf_min": None,
+    }
+
+
+def _merge(totals, readings, energy_wh, power_sum, peak, pf_sum, pf_min):
+    totals["readings"] += readings
+    totals["energy_wh"] += energy_wh
+    totals["power_sum"] += power_sum
+    totals["pf_sum"] += pf_sum
+    if totals["peak_power_w"] is None or peak > totals["peak_power_w"]:
+        totals["peak_power_w"] = peak
+    if totals["pf_min"] is None or pf_min < totals["pf_min"]:
+        totals["pf_min"] = pf_min
+
+
+def _reduce_chunk(rows, carry, max_gap, per_device):
+    """
+    Fold one chunk of (device_id, timestamp, V, I, PF) rows into per_device totals.
+    carry: (device_id, epoch seconds, power) of the previous chunk's last reading, so
+    the interval across the chunk boundary is integrated too. Returns the new carry.
+    """
+    if np is not None:
+        dev = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        t = np.fromiter((r[1].timestamp() for r in rows), dtype=np.float64, count=len(rows))
+        pf = np.fromiter((r[4] for r in rows), dtype=np.float64, count=len(rows))
+        p = np.fromiter((r[2] * r[3] for r in rows), dtype=np.float64, count=len(rows)) * pf
+
+        # Trapezoid between each reading and the one before it (same device, gap in range).
+        prev_dev = np.concatenate(([carry[0] if carry else -1], dev[:-1]))
+        prev_t = np.concatenate(([carry[1] if carry else 0.0], t[:-1]))
+        prev_p = np.concatenate(([carry[2] if carry else 0.0], p[:-1]))
+        dt = t - prev_t
+        joined = (dev == prev_dev) & (dt > 0) & (dt <= max_gap)
+        energy = np.where(joined, (p + prev_p) / 2 * dt, 0.0) / 3600
+
+        starts = np.flatnonzero(np.concatenate(([True], dev[1:] != dev[:-1])))
+        counts = np.diff(np.append(starts, len(dev)))
+        sums = {
+            "energy": np.add.reduceat(energy, starts),
+            "power": np.add.reduceat(p, starts),
+            "peak": np.maximum.reduceat(p, starts),
+            "pf": np.add.reduceat(pf, starts),
+            "pf_min": np.minimum.reduceat(pf, starts),
+        }
+        for i, device_id in enumerate(dev[starts].tolist()):
+            _merge(
+                per_device[device_id],
+                int(counts[i]),
+                float(sums["energy"][i]),
+                float(sums["power"][i]),
+                float(sums["peak"][i]),
+                float(sums["pf"][i]),
+                float(sums["pf_min"][i]),
+            )
+        return int(dev[-1]), float(t[-1]), float(p[-1])
+
+    for device_id, ts, voltage, current, power_factor in rows:
+        t = ts.timestamp()
+        p = voltage * current * power_factor
+        energy = 0.0
+        if carry and carry[0] == device_id and 0 < t - carry[1] <= max_gap:
+            energy = (p + carry[2]) / 2 * (t - carry[1]) / 3600
+        _merge(per_device[device_id], 1, energy, p, p, power_factor, power_factor)
+        carry = (device_id, t, p)
+    return carry
+
+
+def device_energy(start, end, scope):
+    """
+    {device_id: totals} for telemetry with start <= timestamp <= end. scope: telemetry
+    filter kwargs (facility / zone, device__ prefixed).
+    """
+    chunk_size, max_gap = _settings()
+    rows = (
+        Telemetry.objects.filter(timestamp__gte=start, timestamp__lte=end, **scope)
+        .order_by("device_id", "timestamp")
+        .values_list("device_id", "timestamp", "voltage", "current", "power_factor")
+        .iterator(chunk_size=chunk_size)
+    )
+    per_device = defaultdict(_totals)
+    carry = None
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            carry = _reduce_chunk(chunk, carry, max_gap, per_device)
+            chunk = []
+    if chunk:
+        _reduce_chunk(chunk, carry, max_gap, per_device)
+    return per_device
+
+
+def _summary(totals):
+    n = totals["readings"]
+    return {
+        "readings": n,
+        "energy_kwh": round(totals["energy_wh"] / 1000, 3),
+        "avg_power_w": round(totals["power_sum"] / n, 1) if n else None,
+        "peak_power_w": round(totals["peak_power_w"], 1) if n else None,
+        "avg_power_factor": round(totals["pf_sum"] / n, 3) if n else None,
+        "min_power_factor": round(totals["pf_min"], 3) if n else None,
+    }
+
+
+def energy_stats(start, end, scope):
+    """
+    Energy / power / power factor per device, zone and facility plus a total.
+    Zone, facility and total figures pool their devices' readings: energy adds up,
+    averages are over all readings, peak is the highest single reading.
+    """
+    per_device = device_energy(start, end, scope)
+    devices = (
+        Device.objects.filter(id__in=per_device.keys())
+        .select_related("zone__facility")
+        .order_by("zone__facility__name", "zone__code", "code")
+    )
+    zones = defaultdict(_totals)
+    facilities = defaultdict(_totals)
+    total = _totals()
+    device_rows = []
+    for device in devices:
+        totals = per_device[device.id]
+        args = [totals[k] for k in _FIELDS]
+        _merge(zones[device.zone], *args)
+        _merge(facilities[device.zone.facility], *args)
+        _merge(total, *args)
+        device_rows.append({
+            "device_id": device.id,
+            "device_code": device.code,
+            "zone_id": device.zone_id,
+            **_summary(totals),
+        })
+    return {
+        **_summary(total),
+        "facilities": [
+            {"facility_id": f.id, "facility_name": f.name, **_summary(t)}
+            for f, t in facilities.items()
+        ],
+        "zones": [
+            {"zone_id": z.id, "zone_code": z.code, "facility_id": z.facility_id, **_summary(t)}
+            for z, t in zones.items()
+        ],
+        "devices": device_rows,
+    }
@@ -0,0 +1,129 @@
+"""
+Batch ingestion: set-based device lookup, duplicate detection and insert.
+Used by the bulk endpoints; errors use the bulk response shape ({"index", "errors"}).
+"""
+from django.db import transaction
+
+from .dashboard_cache import touch_timestamps
+from .models import ParkingLog, Telemetry
+from .registry import registry
+from .state import LAST_TELEMETRY, latest_by_device, record_parking_logs, touch_last_seen
+from .services import (
+    acknowledge_offline_alerts_for_devices,
+    create_alerts_bulk,
+    evaluate_telemetry_alerts,
+)
+
+
+def _new_items(model, items, errors):
+    """
+    Resolve device codes and drop duplicates for a batch of validated items.
+
+    Devices come from the registry; one (device, timestamp-range) duplicate query per batch.
+    Appends per-index errors; returns [(index, device, data)] for rows to insert.
+    """
+    refs = registry.get_many({data["device_code"] for _, data in items})
+    devices = {code: ref.as_device() for code, ref in refs.items()}
+
+    candidates = []
+    for i, data in items:
+        device = devices.get(data["device_code"])
+        if device is None:
+            errors.append({"index": i, "errors": {"device_code": ["Device not found."]}})
+            continue
+        candidates.append((i, device, data))
+    if not candidates:
+        return []
+
+    timestamps = [data["timestamp"] for _, _, data in candidates]
+    existing = set(
+        model.objects.filter(
+            device_id__in={device.pk for _, device, _ in candidates},
+            timestamp__gte=min(timestamps),
+            timestamp__lte=max(timestamps),
+        ).values_list("device_id", "timestamp")
+    )
+
+    new = []
+    seen = set()  # (device_id, timestamp) for duplicate in request
+    for i, device, data in candidates:
+        key = (device.pk, data["timestamp"])
+        if key in seen:
+            errors.append({"index": i, "errors": {"timestamp": ["Duplicate in request."]}})
+            continue
+        if key in existing:
+            errors.append({"index": i, "errors": {"timestamp": ["Duplicate in database."]}})
+            continue
+        seen.add(key)
+        new.append((i, device, data))
+    return new
+
+
+def ingest_telemetry_batch(items):
+    """
+    Insert validated telemetry in a single transaction.
+
+    items: list of (index, validated_data) in request order.
+    Returns (created_count, errors). Alerts are evaluated for the batch as a whole.
+    """
+    errors = []
+    if not items:
+        return 0, errors
+
+    to_create = [
+        Telemetry(
+            device=device,
+            voltage=data["voltage"],
+            current=data["current"],
+            power_factor=data["power_factor"],
+            timestamp=data["timestamp"],
+        )
+        for _, device, data in _new_items(Telemetry, items, errors)
+    ]
+
+    if to_create:
+        device_ids = [obj.device_id for obj in to_create]
+        candidates = evaluate_telemetry_alerts(
+            device_ids,
+            [obj.voltage for obj in to_create],
+            [obj.current for obj in to_create],
+        )
+        with transaction.atomic():
+            Telemetry.objects.bulk_create(to_create)
+            touch_last_seen(
+                LAST_TELEMETRY, latest_by_device((o.device_id, o.timestamp) for o in to_create)
+            )
+            touch_timestamps({o.timestamp for o in to_create})
+            acknowledge_offline_alerts_for_devices(set(device_ids))
+            create_alerts_bulk(candidates)
+
+    return len(to_create), errors
+
+
+def ingest_parking_log_batch(items):
+    """
+    Insert validated parking log events in a single transaction.
+
+    items: list of (index, validated_data) in request order.
+    Returns (created_count, errors). Duplicates are the same (device, timestamp),
+    either repeated in the batch or already stored.
+    """
+    errors = []
+    if not items:
+        return 0, errors
+
+    to_create = [
+        ParkingLog(
+            device=device,
+            is_occupied=data["is_occupied"],
+            timestamp=data["timestamp"],
+        )
+        for _, device, data in _new_items(ParkingLog, items, errors)
+    ]
+
+    if to_create:
+        with transaction.atomic():
+            ParkingLog.objects.bulk_create(to_create)
+            record_parking_logs(to_create)
+
+    return len(to_create), errors
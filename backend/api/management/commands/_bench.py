@@ -0,0 +1,58 @@
+"""Helpers shared by the bench_* management commands."""
+import contextlib
+import os
+import statistics
+import tempfile
+
+from django.db import connection
+
+from api.models import Device, ParkingFacility, ParkingZone
+from api.registry import registry
+
+
+@contextlib.contextmanager
+def scratch_database():
+    """
+    Run the block against a throwaway migrated SQLite file, never the real database.
+    A file (not :memory:) so that several threads can use it, like a real deployment.
+    """
+    fd, path = tempfile.mkstemp(prefix="bench-", suffix=".sqlite3")
+    os.close(fd)
+    connection.settings_dict.setdefault("TEST", {})["NAME"] = path
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    registry.invalidate()
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        registry.invalidate()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def seed_devices(count, zones=4):
+    """Create one facility with `zones` zones and `count` devices; return the device codes."""
+    facility = ParkingFacility.objects.create(name="Bench Lot", code="BENCH")
+    zone_objs = [
+        ParkingZone.objects.create(facility=facility, name=f"Level {i}", code=f"L{i}")
+        for i in range(zones)
+    ]
+    Device.objects.bulk_create(
+        Device(zone=zone_objs[i % zones], code=f"BENCH-{i:05d}") for i in range(count)
+    )
+    registry.invalidate()  # bulk_create sends no signals
+    return list(Device.objects.values_list("code", flat=True))
+
+
+def summarize(latencies_ms, wall_s):
+    """Throughput and latency percentiles for a list of per-request latencies."""
+    latencies_ms = sorted(latencies_ms)
+    n = len(latencies_ms)
+    return {
+        "requests": n,
+        "wall_s": round(wall_s, 3),
+        "req_per_s": round(n / wall_s, 1) if wall_s else None,
+        "p50_ms": round(statistics.median(latencies_ms), 2) if n else None,
+        "p95_ms": round(latencies_ms[int(n * 0.95) - 1], 2) if n else None,
+        "max_ms": round(latencies_ms[-1], 2) if n else None,
+    }
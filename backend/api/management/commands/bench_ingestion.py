@@ -0,0 +1,117 @@
+"""
+Compare the WSGI (DRF) ingestion views with their async ASGI variants.
+Runs on a scratch database. Run: python manage.py bench_ingestion [--requests N --concurrency C]
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.utils import timezone
+
+from ._bench import scratch_database, seed_devices, summarize
+
+
+class Command(BaseCommand):
+    help = "Benchmark sync (WSGI) vs async (ASGI) ingestion endpoints on a scratch database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Requests per scenario.")
+        parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight.")
+        parser.add_argument("--bulk-size", type=int, default=100, help="Records per bulk request.")
+        parser.add_argument("--devices", type=int, default=200)
+
+    def handle(self, *args, **options):
+        n = options["requests"]
+        concurrency = options["concurrency"]
+        bulk_size = options["bulk_size"]
+        with scratch_database():
+            codes = seed_devices(options["devices"])
+            base = timezone.now() - timedelta(days=1)
+            counter = iter(range(10**9))
+
+            def ts():
+                return (base + timedelta(milliseconds=next(counter))).isoformat()
+
+            def telemetry():
+                return {
+                    "device_code": codes[next(counter) % len(codes)],
+                    "voltage": 230.0,
+                    "current": 1.5,
+                    "power_factor": 0.95,
+                    "timestamp": ts(),
+                }
+
+            scenarios = [
+                ("telemetry", "/api/telemetry/", "/api/async/telemetry/", telemetry),
+                (
+                    "telemetry bulk",
+                    "/api/telemetry/bulk/",
+                    "/api/async/telemetry/bulk/",
+                    lambda: [telemetry() for _ in range(bulk_size)],
+                ),
+                (
+                    "parking log",
+                    "/api/parking-log/",
+                    "/api/async/parking-log/",
+                    lambda: {
+                        "device_code": codes[next(counter) % len(codes)],
+                        "is_occupied": True,
+                        "timestamp": ts(),
+                    },
+                ),
+            ]
+            self.stdout.write(f"{n} requests per run, {concurrency} in flight\n")
+            self.stdout.write(
+                f"{'scenario':<16}{'server':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'errors':>8}"
+            )
+            for name, sync_url, async_url, make in scenarios:
+                for server, runner, url in (
+                    ("wsgi", self._run_wsgi, sync_url),
+                    ("asgi", self._run_asgi, async_url),
+                ):
+                    bodies = [json.dumps(make()) for _ in range(n)]
+                    result, errors = runner(url, bodies, concurrency)
+                    self.stdout.write(
+                        f"{name:<16}{server:<8}{result['req_per_s']:>10}{result['p50_ms']:>10}"
+                        f"{result['p95_ms']:>10}{result['max_ms']:>10}{errors:>8}"
+                    )
+
+    def _run_wsgi(self, url, bodies, concurrency):
+        """Thread per in-flight request, as a threaded WSGI server would do."""
+        client = Client(raise_request_exception=False)
+
+        def one(body):
+            started = time.perf_counter()
+            resp = client.post(url, body, content_type="application/json")
+            return (time.perf_counter() - started) * 1000, resp.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(one, bodies))
+        wall = time.perf_counter() - started
+        errors = sum(1 for _, code in results if code >= 400)
+        return summarize([ms for ms, _ in results], wall), errors
+
+    def _run_asgi(self, url, bodies, concurrency):
+        """Coroutines on one event loop, as an ASGI server would do."""
+        client = AsyncClient(raise_request_exception=False)
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one(body):
+            async with gate:
+                started = time.perf_counter()
+                resp = await client.post(url, body, content_type="application/json")
+                return (time.perf_counter() - started) * 1000, resp.status_code
+
+        async def run_all():
+            return await asyncio.gather(*(one(body) for body in bodies))
+
+        started = time.perf_counter()
+        results = asyncio.run(run_all())
+        wall = time.perf_counter() - started
+        errors = sum(1 for _, code in results if code >= 400)
+        return summarize([ms for ms, _ in results], wall), errors
@@ -0,0 +1,100 @@
+"""
+Compare usage report formats (bytes on the wire, wall time, time to first byte) over a
+generated month of parking logs. Runs on a scratch database.
+Run: python manage.py bench_report_formats [--devices N --interval S]
+"""
+import gzip
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.utils import timezone
+
+from api.models import Device, ParkingLog
+
+from ._bench import scratch_database, seed_devices
+
+DAYS = 30
+
+
+class Command(BaseCommand):
+    help = "Benchmark usage report formats (csv, ndjson, gzip variants) on a generated month of logs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--devices", type=int, default=50)
+        parser.add_argument("--interval", type=int, default=600, help="Seconds between logs per device.")
+        parser.add_argument("--repeat", type=int, default=1, help="Runs per format; the best is reported.")
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            seed_devices(options["devices"])
+            date_to = timezone.localdate() - timedelta(days=1)
+            date_from = date_to - timedelta(days=DAYS - 1)
+            total = self._seed_logs(date_from, options["interval"])
+            self.stdout.write(f"{total:,} parking logs, {options['devices']} devices, {DAYS} days")
+
+            client = Client()
+            query = f"/api/reports/usage/?date_from={date_from}&date_to={date_to}&format="
+            scenarios = [
+                ("csv", "csv", {}),
+                ("csv (Accept-Encoding: gzip)", "csv", {"HTTP_ACCEPT_ENCODING": "gzip"}),
+                ("csv.gz", "csv.gz", {}),
+                ("ndjson", "ndjson", {}),
+                ("ndjson (Accept-Encoding: gzip)", "ndjson", {"HTTP_ACCEPT_ENCODING": "gzip"}),
+                ("ndjson.gz", "ndjson.gz", {}),
+            ]
+            results, bodies = [], {}
+            for name, fmt, headers in scenarios:
+                best = None
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    response = client.get(query + fmt, **headers)
+                    if response.status_code != 200:
+                        raise CommandError(f"{name}: HTTP {response.status_code}")
+                    first, parts = None, []
+                    for part in response.streaming_content:
+                        if first is None:
+                            first = time.perf_counter() - started
+                        parts.append(part)
+                    wall = time.perf_counter() - started
+                    if best is None or wall < best[1]:
+                        best = (first, wall)
+                body = b"".join(parts)
+                if response.get("Content-Encoding") == "gzip" or fmt.endswith(".gz"):
+                    body = gzip.decompress(body)
+                plain = bodies.setdefault(fmt.removesuffix(".gz"), body)
+                if body != plain:
+                    raise CommandError(f"{name}: decompressed output differs from {fmt.removesuffix('.gz')}.")
+                results.append((name, sum(len(p) for p in parts), *best))
+
+        csv_bytes = results[0][1]
+        self.stdout.write(f"{'format':<32}{'bytes':>14}{'vs csv':>9}{'first byte':>13}{'wall':>10}")
+        for name, size, first, wall in results:
+            self.stdout.write(
+                f"{name:<32}{size:>14,}{size / csv_bytes:>8.0%}{first * 1000:>10.1f} ms{wall:>8.2f} s"
+            )
+        self.stdout.write(self.style.SUCCESS("compressed outputs decompress to the plain ones"))
+
+    def _seed_logs(self, date_from, interval):
+        rng = random.Random(42)
+        start = timezone.make_aware(datetime.combine(date_from, datetime.min.time()))
+        steps = DAYS * 86400 // interval
+        total = 0
+        for device_id in Device.objects.values_list("id", flat=True):
+            occupied = False
+            logs = []
+            for step in range(steps):
+                if rng.random() < 0.3:
+                    occupied = not occupied
+                logs.append(
+                    ParkingLog(
+                        device_id=device_id,
+                        is_occupied=occupied,
+                        timestamp=start + timedelta(seconds=step * interval + rng.randrange(interval)),
+                    )
+                )
+            ParkingLog.objects.bulk_create(logs, batch_size=5000)
+            total += len(logs)
+        return total
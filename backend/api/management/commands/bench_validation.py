@@ -0,0 +1,81 @@
+"""
+Compare per-record DRF serializer validation with TelemetryValidator on a generated batch.
+No database needed. Run: python manage.py bench_validation [--records N]
+"""
+import json
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.serializers import TelemetryBulkItemSerializer
+from api.validators import TelemetryValidator
+
+
+class Command(BaseCommand):
+    help = "Benchmark telemetry batch validation: DRF serializer per item vs TelemetryValidator."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--records", type=int, default=5000)
+        parser.add_argument("--invalid-pct", type=float, default=5.0, help="Share of malformed records.")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per validator; the best is reported.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        now = timezone.now()
+        records = []
+        for i in range(options["records"]):
+            record = {
+                "device_code": f"PARK-B1-S{i % 500:03d}",
+                "voltage": round(rng.uniform(210, 240), 2),
+                "current": round(rng.uniform(0, 10), 3),
+                "power_factor": round(rng.uniform(0.8, 1), 3),
+                "timestamp": (now - timedelta(seconds=10 * i)).isoformat(),
+            }
+            if rng.random() * 100 < options["invalid_pct"]:
+                record[rng.choice(["voltage", "power_factor", "timestamp"])] = rng.choice(
+                    [None, "abc", -1, 2, (now + timedelta(hours=1)).isoformat()]
+                )
+            records.append(record)
+        # What a view sees after JSON parsing.
+        records = json.loads(json.dumps(records))
+
+        def serializer_batch():
+            items, errors = [], []
+            for i, item in enumerate(records):
+                ser = TelemetryBulkItemSerializer(data=item)
+                if ser.is_valid():
+                    items.append((i, dict(ser.validated_data)))
+                else:
+                    errors.append({"index": i, "errors": ser.errors})
+            return items, errors
+
+        def validator_batch():
+            return TelemetryValidator().validate_many(records)
+
+        results = {}
+        for name, func in (("serializer", serializer_batch), ("validator", validator_batch)):
+            best = None
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                out = func()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            results[name] = (best, out)
+
+        (slow, (slow_items, slow_errors)), (fast, (fast_items, fast_errors)) = (
+            results["serializer"],
+            results["validator"],
+        )
+        if json.dumps(slow_errors) != json.dumps(fast_errors) or repr(slow_items) != repr(fast_items):
+            raise CommandError("TelemetryValidator output differs from the serializer's.")
+
+        n = len(records)
+        self.stdout.write(f"{n} records, {len(fast_errors)} invalid; outputs identical")
+        for name, elapsed in (("serializer", slow), ("validator", fast)):
+            self.stdout.write(
+                f"{name:<12}{elapsed * 1000:>10.1f} ms{n / elapsed:>14,.0f} records/s"
+            )
+        self.stdout.write(self.style.SUCCESS(f"speedup: {slow / fast:.1f}x"))
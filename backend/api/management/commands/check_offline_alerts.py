@@ -1,4 +1,6 @@
-"""Run periodically (e.g. every 1-2 min) to create offline alerts for devices with no recent telemetry."""
+"""
+One-shot offline check; run periodically (e.g. every 1-2 min) if monitor_offline_alerts is not running.
+"""
 from django.core.management.base import BaseCommand
 from api.services import create_offline_alerts
 
@@ -0,0 +1,56 @@
+"""
+Long-running offline detector. Run: python manage.py monitor_offline_alerts
+Replaces running check_offline_alerts from cron; run one instance per database.
+"""
+import logging
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from api.offline_monitor import OfflineMonitor
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Create offline alerts as soon as a device's telemetry deadline passes (runs until stopped)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll-interval", type=float, default=1.0,
+            help="Seconds between checks for new telemetry (default 1).",
+        )
+
+    def handle(self, *args, **options):
+        poll_interval = options["poll_interval"]
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+
+        monitor = OfflineMonitor()
+        monitor.refresh()
+        self.stdout.write(f"Watching {len(monitor)} devices.")
+        try:
+            while not self._stopping:
+                wait = poll_interval
+                try:
+                    close_old_connections()
+                    monitor.refresh()
+                    created = monitor.fire_due()
+                    if created:
+                        self.stdout.write(f"{timezone.now():%Y-%m-%d %H:%M:%S} created {len(created)} offline alerts.")
+                    next_deadline = monitor.next_deadline()
+                    if next_deadline is not None:
+                        wait = min(wait, max(0.0, (next_deadline - timezone.now()).total_seconds()))
+                except Exception:
+                    # Keep watching the other devices; the next poll retries.
+                    logger.exception("Offline monitor poll failed")
+                time.sleep(wait)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS("Offline monitor stopped."))
+
+    def _stop(self, signum, frame):
+        self._stopping = True
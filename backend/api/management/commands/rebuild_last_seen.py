@@ -0,0 +1,11 @@
+"""Rebuild the DeviceLastSeen table from full history. Run: python manage.py rebuild_last_seen"""
+from django.core.management.base import BaseCommand
+from api.state import rebuild_last_seen
+
+
+class Command(BaseCommand):
+    help = "Recompute last telemetry / parking log time per device from the raw tables."
+
+    def handle(self, *args, **options):
+        count = rebuild_last_seen()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt last-seen for {count} devices."))
@@ -0,0 +1,11 @@
+"""Rebuild current device occupancy and zone counters from the parking log. Run: python manage.py rebuild_occupancy"""
+from django.core.management.base import BaseCommand
+from api.occupancy import rebuild_occupancy
+
+
+class Command(BaseCommand):
+    help = "Recompute current occupancy per device and occupied/slot counts per zone."
+
+    def handle(self, *args, **options):
+        count = rebuild_occupancy()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt occupancy for {count} devices."))
@@ -0,0 +1,48 @@
+"""
+Recompute hourly parking rollups from the parking log.
+Run: python manage.py rebuild_parking_rollups [--since YYYY-MM-DD] [--device CODE]
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.models import Device, ParkingHourlyRollup, ParkingLog
+from api.rollups import recompute_parking_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute per-device hourly parking rollups (e.g. after loading or fixing log rows directly)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Only recompute hours from this date (YYYY-MM-DD) on.")
+        parser.add_argument("--device", help="Only recompute this device code.")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                day = datetime.strptime(options["since"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("Invalid --since. Use YYYY-MM-DD.")
+            since = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+        if options["device"]:
+            device_ids = list(
+                Device.objects.filter(code=options["device"]).values_list("id", flat=True)
+            )
+            if not device_ids:
+                raise CommandError(f"Device not found: {options['device']}")
+        else:
+            # Devices with events in range, plus any with rollup rows there that may be stale
+            logs = ParkingLog.objects.all()
+            rollups = ParkingHourlyRollup.objects.all()
+            if since is not None:
+                logs = logs.filter(timestamp__gte=since)
+                rollups = rollups.filter(hour__gte=since)
+            device_ids = set(logs.order_by().values_list("device_id", flat=True).distinct())
+            device_ids |= set(rollups.order_by().values_list("device_id", flat=True).distinct())
+
+        for device_id in device_ids:
+            recompute_parking_rollups(device_id, start=since)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt hourly rollups for {len(device_ids)} devices."))
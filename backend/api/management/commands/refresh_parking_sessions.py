@@ -0,0 +1,29 @@
+"""
+Build parking sessions from new parking log rows. Run periodically (e.g. every few minutes):
+python manage.py refresh_parking_sessions [--full] [--device CODE]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Device
+from api.sessions import refresh_sessions
+
+
+class Command(BaseCommand):
+    help = "Pair occupied/free parking log events into sessions, reading only rows not seen before."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Drop sessions and rebuild from the whole log.")
+        parser.add_argument("--device", help="Only refresh this device code.")
+
+    def handle(self, *args, **options):
+        device_ids = None
+        if options["device"]:
+            device_ids = list(
+                Device.objects.filter(code=options["device"]).values_list("id", flat=True)
+            )
+            if not device_ids:
+                raise CommandError(f"Device not found: {options['device']}")
+        devices, created = refresh_sessions(device_ids, full=options["full"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Refreshed {devices} devices, {created} new sessions.")
+        )
@@ -0,0 +1,55 @@
+"""
+Report job worker. Run: python manage.py run_report_jobs
+For REPORT_JOBS["WORKERS"] = 0, so reports render in their own process instead of
+web worker threads. Several instances can share the queue. Also expires old artifacts
+and requeues jobs whose worker died.
+"""
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.report_jobs import claim_next, expire_jobs, render, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Render queued background report jobs (runs until stopped)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll-interval", type=float, default=1.0,
+            help="Seconds between checks for queued jobs (default 1).",
+        )
+
+    def handle(self, *args, **options):
+        poll_interval = options["poll_interval"]
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+
+        self.stdout.write("Waiting for report jobs.")
+        try:
+            while not self._stopping:
+                close_old_connections()
+                expired = expire_jobs()
+                if expired:
+                    self.stdout.write(f"Expired {expired} report artifacts.")
+                requeued = requeue_stale_jobs()
+                if requeued:
+                    self.stdout.write(f"Requeued {requeued} abandoned report jobs.")
+                job = claim_next()
+                if job is None:
+                    time.sleep(poll_interval)
+                    continue
+                started = time.monotonic()
+                render(job)
+                job.refresh_from_db()
+                self.stdout.write(
+                    f"Report job {job.pk} {job.status}: {job.rows_done} rows in {time.monotonic() - started:.1f}s."
+                )
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS("Report worker stopped."))
+
+    def _stop(self, signum, frame):
+        self._stopping = True
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="alert",
+            index=models.Index(
+                condition=models.Q(("acknowledged_at__isnull", True)),
+                fields=["device", "alert_type"],
+                name="alert_open_device_type_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_last_seen(apps, schema_editor):
+    Telemetry = apps.get_model("api", "Telemetry")
+    ParkingLog = apps.get_model("api", "ParkingLog")
+    DeviceLastSeen = apps.get_model("api", "DeviceLastSeen")
+    telemetry = dict(
+        Telemetry.objects.values("device_id")
+        .annotate(ts=Max("timestamp"))
+        .values_list("device_id", "ts")
+    )
+    logs = dict(
+        ParkingLog.objects.values("device_id")
+        .annotate(ts=Max("timestamp"))
+        .values_list("device_id", "ts")
+    )
+    DeviceLastSeen.objects.bulk_create(
+        DeviceLastSeen(
+            device_id=device_id,
+            last_telemetry_at=telemetry.get(device_id),
+            last_parking_log_at=logs.get(device_id),
+        )
+        for device_id in telemetry.keys() | logs.keys()
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0002_alert_open_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeviceLastSeen",
+            fields=[
+                (
+                    "device",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="last_seen",
+                        serialize=False,
+                        to="api.device",
+                    ),
+                ),
+                (
+                    "last_telemetry_at",
+                    models.DateTimeField(blank=True, db_index=True, null=True),
+                ),
+                (
+                    "last_parking_log_at",
+                    models.DateTimeField(blank=True, null=True),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                "verbose_name_plural": "Device last seen",
+            },
+        ),
+        migrations.RunPython(backfill_last_seen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 6.0.2 on 2026-10-18 05:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    from api.rollups import tally_events
+
+    ParkingLog = apps.get_model("api", "ParkingLog")
+    ParkingHourlyRollup = apps.get_model("api", "ParkingHourlyRollup")
+    device_ids = ParkingLog.objects.order_by().values_list("device_id", flat=True).distinct()
+    for device_id in list(device_ids):
+        events = (
+            ParkingLog.objects.filter(device_id=device_id)
+            .order_by("timestamp")
+            .values_list("timestamp", "is_occupied")
+            .iterator()
+        )
+        ParkingHourlyRollup.objects.bulk_create(
+            (
+                ParkingHourlyRollup(
+                    device_id=device_id,
+                    hour=hour,
+                    event_count=count,
+                    occupied_count=occupied,
+                    occupied_seconds=seconds,
+                )
+                for hour, (count, occupied, seconds) in tally_events(events).items()
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0003_device_last_seen"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ParkingHourlyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hour", models.DateTimeField(db_index=True)),
+                ("event_count", models.PositiveIntegerField(default=0)),
+                ("occupied_count", models.PositiveIntegerField(default=0)),
+                ("occupied_seconds", models.FloatField(default=0)),
+                (
+                    "device",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hourly_rollups",
+                        to="api.device",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-hour"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("device", "hour"), name="unique_device_hour_rollup"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 6.0.2 on 2026-10-18 05:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_occupancy(apps, schema_editor):
+    from api.occupancy import current_state_from_events
+
+    ParkingLog = apps.get_model("api", "ParkingLog")
+    ParkingZone = apps.get_model("api", "ParkingZone")
+    Device = apps.get_model("api", "Device")
+    DeviceOccupancy = apps.get_model("api", "DeviceOccupancy")
+    ZoneOccupancy = apps.get_model("api", "ZoneOccupancy")
+    rows = (
+        ParkingLog.objects.order_by("device_id", "timestamp")
+        .values_list("device_id", "timestamp", "is_occupied")
+        .iterator()
+    )
+    DeviceOccupancy.objects.bulk_create(
+        (
+            DeviceOccupancy(
+                device_id=device_id,
+                is_occupied=occupied,
+                since=since,
+                last_event_at=last_event_at,
+            )
+            for device_id, occupied, since, last_event_at in current_state_from_events(rows)
+        ),
+        batch_size=1000,
+    )
+    slots = dict(
+        Device.objects.values("zone_id")
+        .annotate(n=Count("id"))
+        .values_list("zone_id", "n")
+    )
+    occupied = dict(
+        DeviceOccupancy.objects.filter(is_occupied=True)
+        .values("device__zone_id")
+        .annotate(n=Count("device"))
+        .values_list("device__zone_id", "n")
+    )
+    ZoneOccupancy.objects.bulk_create(
+        ZoneOccupancy(
+            zone_id=zone_id,
+            occupied=occupied.get(zone_id, 0),
+            slot_count=slots.get(zone_id, 0),
+        )
+        for zone_id in ParkingZone.objects.values_list("id", flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0004_parking_hourly_rollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeviceOccupancy",
+            fields=[
+                (
+                    "device",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="occupancy",
+                        serialize=False,
+                        to="api.device",
+                    ),
+                ),
+                ("is_occupied", models.BooleanField()),
+                ("since", models.DateTimeField()),
+                ("last_event_at", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name_plural": "Device occupancy",
+            },
+        ),
+        migrations.CreateModel(
+            name="ZoneOccupancy",
+            fields=[
+                (
+                    "zone",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="occupancy",
+                        serialize=False,
+                        to="api.parkingzone",
+                    ),
+                ),
+                ("occupied", models.PositiveIntegerField(default=0)),
+                ("slot_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "Zone occupancy",
+            },
+        ),
+        migrations.RunPython(backfill_occupancy, migrations.RunPython.noop),
+    ]
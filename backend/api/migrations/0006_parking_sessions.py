@@ -0,0 +1,64 @@
+# Generated by Django 6.0.2 on 2026-10-18 06:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0005_occupancy"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ParkingSessionCursor",
+            fields=[
+                (
+                    "device",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="session_cursor",
+                        serialize=False,
+                        to="api.device",
+                    ),
+                ),
+                ("last_log_id", models.BigIntegerField(default=0)),
+                ("last_event_at", models.DateTimeField(blank=True, null=True)),
+                ("open_since", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ParkingSession",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start", models.DateTimeField(db_index=True)),
+                ("end", models.DateTimeField()),
+                ("duration_seconds", models.FloatField()),
+                (
+                    "device",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sessions",
+                        to="api.device",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-start"],
+                "indexes": [
+                    models.Index(
+                        fields=["device", "end"], name="api_parking_device__6bdb91_idx"
+                    )
+                ],
+            },
+        ),
+    ]
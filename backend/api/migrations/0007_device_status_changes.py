@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0006_parking_sessions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeCounter",
+            fields=[
+                ("name", models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="devicelastseen",
+            name="change_version",
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+    ]
@@ -70,6 +70,33 @@ class Telemetry(models.Model):
         return f"{self.device.code} @ {self.timestamp}"
 
 
+class DeviceLastSeen(models.Model):
+    """Latest telemetry and parking log time per device, maintained by ingestion."""
+    device = models.OneToOneField(
+        Device, on_delete=models.CASCADE, primary_key=True, related_name="last_seen"
+    )
+    last_telemetry_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    last_parking_log_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Device status version of the last change to this device's status row (api/changes.py)
+    change_version = models.BigIntegerField(default=0, db_index=True)
+
+    class Meta:
+        verbose_name_plural = "Device last seen"
+
+    def __str__(self):
+        return f"{self.device_id} telemetry={self.last_telemetry_at} log={self.last_parking_log_at}"
+
+
+class ChangeCounter(models.Model):
+    """Named monotonic counter, e.g. the device status change version (api/changes.py)."""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}={self.value}"
+
+
 class ParkingLog(models.Model):
     """Occupancy event: slot became occupied or free."""
     device = models.ForeignKey(
@@ -88,6 +115,97 @@ class ParkingLog(models.Model):
         return f"{self.device.code} occupied={self.is_occupied} @ {self.timestamp}"
 
 
+class DeviceOccupancy(models.Model):
+    """Current occupancy per device (its latest parking log), maintained by ingestion."""
+    device = models.OneToOneField(
+        Device, on_delete=models.CASCADE, primary_key=True, related_name="occupancy"
+    )
+    is_occupied = models.BooleanField()
+    since = models.DateTimeField()  # when the current state began
+    last_event_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "Device occupancy"
+
+    def __str__(self):
+        return f"{self.device_id} occupied={self.is_occupied} since {self.since}"
+
+
+class ZoneOccupancy(models.Model):
+    """Occupied slots and slot count per zone, maintained by ingestion."""
+    zone = models.OneToOneField(
+        ParkingZone, on_delete=models.CASCADE, primary_key=True, related_name="occupancy"
+    )
+    occupied = models.PositiveIntegerField(default=0)
+    slot_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Zone occupancy"
+
+    @property
+    def free(self):
+        return max(0, self.slot_count - self.occupied)
+
+    def __str__(self):
+        return f"{self.zone_id}: {self.occupied}/{self.slot_count}"
+
+
+class ParkingHourlyRollup(models.Model):
+    """Parking log events and occupied time per device per hour, maintained by ingestion."""
+    device = models.ForeignKey(
+        Device, on_delete=models.CASCADE, related_name="hourly_rollups"
+    )
+    hour = models.DateTimeField(db_index=True)  # start of the hour, UTC
+    event_count = models.PositiveIntegerField(default=0)
+    occupied_count = models.PositiveIntegerField(default=0)  # events with is_occupied=True
+    occupied_seconds = models.FloatField(default=0)  # occupied time within the hour
+
+    class Meta:
+        ordering = ["-hour"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["device", "hour"],
+                name="unique_device_hour_rollup",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.device_id} @ {self.hour}: {self.event_count} events"
+
+
+class ParkingSession(models.Model):
+    """One stay in a slot: an occupied event up to the next free event. Built by refresh_parking_sessions."""
+    device = models.ForeignKey(
+        Device, on_delete=models.CASCADE, related_name="sessions"
+    )
+    start = models.DateTimeField(db_index=True)
+    end = models.DateTimeField()
+    duration_seconds = models.FloatField()
+
+    class Meta:
+        ordering = ["-start"]
+        indexes = [
+            models.Index(fields=["device", "end"]),
+        ]
+
+    def __str__(self):
+        return f"{self.device_id} {self.start} -> {self.end}"
+
+
+class ParkingSessionCursor(models.Model):
+    """How far refresh_parking_sessions has read a device's parking log."""
+    device = models.OneToOneField(
+        Device, on_delete=models.CASCADE, primary_key=True, related_name="session_cursor"
+    )
+    last_log_id = models.BigIntegerField(default=0)
+    last_event_at = models.DateTimeField(null=True, blank=True)
+    open_since = models.DateTimeField(null=True, blank=True)  # start of the session in progress
+
+    def __str__(self):
+        return f"{self.device_id} through {self.last_event_at}"
+
+
 class Alert(models.Model):
     SEVERITY_INFO = "INFO"
     SEVERITY_WARNING = "WARNING"
@@ -119,6 +237,11 @@ class Alert(models.Model):
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["device", "alert_type"]),
+            models.Index(
+                fields=["device", "alert_type"],
+                name="alert_open_device_type_idx",
+                condition=models.Q(acknowledged_at__isnull=True),
+            ),
         ]
 
     def __str__(self):
@@ -164,6 +287,42 @@ class Target(models.Model):
         return f"Device {self.device.code} {self.date}: {self.target_value}"
 
 
+class ReportJob(models.Model):
+    """Report rendered in the background to a file under REPORT_JOBS["DIR"] (api/report_jobs.py)."""
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_EXPIRED = "expired"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+        (STATUS_EXPIRED, "Expired"),
+    ]
+
+    key = models.CharField(max_length=40, db_index=True)  # identical requests share a key
+    format = models.CharField(max_length=16)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    rows_total = models.BigIntegerField(null=True, blank=True)
+    rows_done = models.BigIntegerField(default=0)
+    size = models.BigIntegerField(null=True, blank=True)  # artifact bytes
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)  # also moved by progress saves while running
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Report {self.pk} ({self.format}, {self.status})"
+
+
 class DeviceHealthScore(models.Model):
     """Snapshot of device health score (0-100)."""
     device = models.ForeignKey(
@@ -0,0 +1,202 @@
+"""
+Current occupancy: one DeviceOccupancy row per device (state of its latest parking log)
+and one ZoneOccupancy counter per zone (occupied slots / slot count).
+
+Ingestion upserts the device rows and moves the zone counters by the number of
+devices that flipped state, with F() updates in the inserting transaction, so
+"free spots per zone" is a read of one row per zone. Events older than a device's
+latest event do not change its current state, though they can change when it began.
+Slot counts are resynced from the device table when devices are added, moved or
+removed (signals.py).
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Device, DeviceOccupancy, ParkingLog, ParkingZone, ZoneOccupancy
+from .registry import registry
+
+
+def occupancy_for(device_ids):
+    """{device_id: DeviceOccupancy} for the devices that have one."""
+    return DeviceOccupancy.objects.in_bulk(list(device_ids))
+
+
+def current_state_from_events(rows):
+    """
+    Yield (device_id, is_occupied, since, last_event_at) from (device_id, timestamp,
+    is_occupied) rows ordered by device then time; since is when the final state began.
+    """
+    current = None
+    for device_id, ts, occupied in rows:
+        if current is not None and current[0] != device_id:
+            yield tuple(current)
+            current = None
+        if current is None or current[1] != occupied:
+            current = [device_id, occupied, ts, ts]
+        else:
+            current[3] = ts
+    if current is not None:
+        yield tuple(current)
+
+
+def update_occupancy(logs, previous):
+    """
+    Apply newly inserted ParkingLog objects. previous: occupancy_for() as read before
+    this batch. Call in the inserting transaction.
+
+    Late events (not after the device's last_event_at) never change the current state,
+    but can move when it began: one in the same state just before since extends the
+    run back, one in the other state inside the run cuts it short. Those devices have
+    since re-read from the log.
+    """
+    by_device = defaultdict(list)
+    for log in logs:
+        by_device[log.device_id].append((log.timestamp, log.is_occupied))
+
+    rows = []
+    flipped = {}  # device_id -> +1 / -1
+    for device_id, events in by_device.items():
+        prev = previous.get(device_id)
+        late = []
+        if prev is not None:
+            late = [e for e in events if e[0] <= prev.last_event_at]
+            events = [e for e in events if e[0] > prev.last_event_at]
+        if events:
+            events.sort()
+            carried = [(prev.last_event_at, prev.is_occupied)] if prev is not None else []
+            (_, state, since, last_event_at), = current_state_from_events(
+                (device_id, ts, occupied) for ts, occupied in carried + events
+            )
+            if prev is not None and since == prev.last_event_at:
+                since = prev.since  # state unchanged since before this batch
+        elif late:
+            state, since, last_event_at = prev.is_occupied, prev.since, prev.last_event_at
+        else:
+            continue
+        if any((ts < since) == (occupied == state) for ts, occupied in late):
+            since = _run_start(device_id, state, last_event_at) or since
+        elif not events:
+            continue
+        rows.append(
+            DeviceOccupancy(
+                device_id=device_id, is_occupied=state, since=since, last_event_at=last_event_at
+            )
+        )
+        if state != (prev.is_occupied if prev is not None else False):
+            flipped[device_id] = 1 if state else -1
+    if not rows:
+        return
+    DeviceOccupancy.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["device"],
+        update_fields=["is_occupied", "since", "last_event_at"],
+    )
+    if flipped:
+        _move_zone_counters(flipped)
+
+
+def _run_start(device_id, state, last_event_at):
+    """First event of the device's final run of `state` ending at last_event_at, from the log."""
+    logs = ParkingLog.objects.filter(device_id=device_id, timestamp__lte=last_event_at)
+    boundary = logs.exclude(is_occupied=state).aggregate(ts=Max("timestamp"))["ts"]
+    run = logs.filter(is_occupied=state)
+    if boundary is not None:
+        run = run.filter(timestamp__gt=boundary)
+    return run.aggregate(ts=Min("timestamp"))["ts"]
+
+
+def _zone_ids(device_ids):
+    zones = {}
+    unknown = []
+    for device_id in device_ids:
+        ref = registry.get_by_id(device_id)
+        if ref is None:
+            unknown.append(device_id)
+        else:
+            zones[device_id] = ref.zone_id
+    if unknown:
+        zones.update(Device.objects.filter(id__in=unknown).values_list("id", "zone_id"))
+    return zones
+
+
+def _move_zone_counters(flipped):
+    zone_of = _zone_ids(flipped.keys())
+    delta = defaultdict(int)
+    for device_id, change in flipped.items():
+        if device_id in zone_of:
+            delta[zone_of[device_id]] += change
+    by_change = defaultdict(list)
+    for zone_id, change in delta.items():
+        if change:
+            by_change[change].append(zone_id)
+    missing = []
+    for change, zone_ids in by_change.items():
+        updated = ZoneOccupancy.objects.filter(zone_id__in=zone_ids).update(
+            occupied=Greatest(F("occupied") + change, 0), updated_at=timezone.now()
+        )
+        if updated < len(zone_ids):
+            missing.extend(zone_ids)
+    if missing:
+        sync_zone_occupancy(missing, create=True)
+
+
+def sync_zone_occupancy(zone_ids=None, create=False):
+    """
+    Recount slots and occupied devices for the given zones (all when None). Existing
+    counter rows are updated; rows for zones without one are only added with create=True.
+    """
+    zones = ParkingZone.objects.all()
+    if zone_ids is not None:
+        zones = zones.filter(id__in=zone_ids)
+    zone_ids = list(zones.values_list("id", flat=True))
+    slots = dict(
+        Device.objects.filter(zone_id__in=zone_ids)
+        .values("zone_id")
+        .annotate(n=Count("id"))
+        .values_list("zone_id", "n")
+    )
+    occupied = dict(
+        DeviceOccupancy.objects.filter(is_occupied=True, device__zone_id__in=zone_ids)
+        .values("device__zone_id")
+        .annotate(n=Count("device"))
+        .values_list("device__zone_id", "n")
+    )
+    counters = [
+        ZoneOccupancy(zone_id=z, occupied=occupied.get(z, 0), slot_count=slots.get(z, 0))
+        for z in zone_ids
+    ]
+    if create:
+        ZoneOccupancy.objects.bulk_create(
+            counters,
+            update_conflicts=True,
+            unique_fields=["zone"],
+            update_fields=["occupied", "slot_count", "updated_at"],
+        )
+        return
+    for counter in counters:
+        ZoneOccupancy.objects.filter(zone_id=counter.zone_id).update(
+            occupied=counter.occupied, slot_count=counter.slot_count, updated_at=timezone.now()
+        )
+
+
+def rebuild_occupancy():
+    """Recompute device occupancy from the full parking log, then every zone counter."""
+    rows = (
+        ParkingLog.objects.order_by("device_id", "timestamp")
+        .values_list("device_id", "timestamp", "is_occupied")
+        .iterator()
+    )
+    states = [
+        DeviceOccupancy(device_id=d, is_occupied=s, since=since, last_event_at=last)
+        for d, s, since, last in current_state_from_events(rows)
+    ]
+    with transaction.atomic():
+        DeviceOccupancy.objects.all().delete()
+        DeviceOccupancy.objects.bulk_create(states, batch_size=1000)
+        sync_zone_occupancy(create=True)
+    return len(states)
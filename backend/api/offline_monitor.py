@@ -0,0 +1,118 @@
+"""
+Deadline-driven offline detection for the monitor_offline_alerts daemon.
+
+Keeps a min-heap of "goes offline at" deadlines (last telemetry + OFFLINE_MINUTES),
+one live entry per device. Ingestion reaches the daemon through DeviceLastSeen:
+each poll reads only rows whose updated_at moved since the previous poll
+(indexed), so cost follows ingestion churn, not fleet size, and there is never a
+scan of the telemetry table. Superseded heap entries are skipped lazily when popped.
+
+Before alerting, due devices are re-read from DeviceLastSeen: a device whose telemetry
+moved on (a change the watermark missed) is rescheduled, and a device that was deleted
+is dropped. Deleted devices are also dropped from the schedule every
+VANISHED_CHECK_SECONDS.
+"""
+import heapq
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Alert, DeviceLastSeen
+from .services import OFFLINE_MINUTES, create_alerts_bulk
+
+# Re-read rows updated this long before the watermark, so a transaction that
+# committed late with an older updated_at is usually not missed. Re-reading is
+# harmless; later commits are caught by the re-check in fire_due.
+WATERMARK_OVERLAP = timedelta(seconds=5)
+
+# Seconds between checks for scheduled devices that no longer exist.
+VANISHED_CHECK_SECONDS = 60
+
+# Due devices re-read per query in fire_due.
+RECHECK_BATCH = 500
+
+
+class OfflineMonitor:
+    def __init__(self, offline_after=None):
+        self.offline_after = offline_after or timedelta(minutes=OFFLINE_MINUTES)
+        self._heap = []  # (deadline, device_id)
+        self._deadlines = {}  # device_id -> live deadline
+        self._watermark = None  # newest DeviceLastSeen.updated_at seen
+        self._vanished_check_at = time.monotonic() + VANISHED_CHECK_SECONDS
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def schedule(self, device_id, last_telemetry_at):
+        deadline = last_telemetry_at + self.offline_after
+        if self._deadlines.get(device_id) == deadline:
+            return
+        self._deadlines[device_id] = deadline
+        heapq.heappush(self._heap, (deadline, device_id))
+
+    def refresh(self):
+        """Pull last-telemetry changes since the previous call. Returns rows read."""
+        qs = DeviceLastSeen.objects.filter(last_telemetry_at__isnull=False)
+        if self._watermark is not None:
+            qs = qs.filter(updated_at__gte=self._watermark - WATERMARK_OVERLAP)
+        count = 0
+        for device_id, last_ts, updated_at in qs.values_list(
+            "device_id", "last_telemetry_at", "updated_at"
+        ).iterator():
+            count += 1
+            self.schedule(device_id, last_ts)
+            if self._watermark is None or updated_at > self._watermark:
+                self._watermark = updated_at
+        if time.monotonic() >= self._vanished_check_at:
+            self.forget_vanished()
+        return count
+
+    def forget_vanished(self):
+        """Unschedule devices whose DeviceLastSeen row is gone (device deleted)."""
+        existing = set(DeviceLastSeen.objects.values_list("device_id", flat=True))
+        for device_id in [d for d in self._deadlines if d not in existing]:
+            del self._deadlines[device_id]  # its heap entry is skipped when popped
+        self._vanished_check_at = time.monotonic() + VANISHED_CHECK_SECONDS
+
+    def next_deadline(self):
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None):
+        """Device ids whose deadline has passed; they leave the heap until seen again."""
+        now = now or timezone.now()
+        due = []
+        while self._heap and self._heap[0][0] < now:
+            deadline, device_id = heapq.heappop(self._heap)
+            if self._deadlines.get(device_id) != deadline:
+                continue  # superseded by newer telemetry
+            del self._deadlines[device_id]
+            due.append(device_id)
+        return due
+
+    def fire_due(self, now=None):
+        """
+        Create offline alerts for overdue devices. Returns the alerts created.
+        Due devices whose telemetry moved on in the database are rescheduled instead,
+        and deleted devices are skipped.
+        """
+        now = now or timezone.now()
+        due = []
+        popped = self.pop_due(now)
+        for i in range(0, len(popped), RECHECK_BATCH):
+            for device_id, last_ts in DeviceLastSeen.objects.filter(
+                device_id__in=popped[i:i + RECHECK_BATCH], last_telemetry_at__isnull=False
+            ).values_list("device_id", "last_telemetry_at"):
+                if last_ts + self.offline_after < now:
+                    due.append(device_id)
+                else:
+                    self.schedule(device_id, last_ts)
+        return create_alerts_bulk({
+            (device_id, Alert.ALERT_OFFLINE): (
+                Alert.SEVERITY_WARNING,
+                f"No telemetry received for {OFFLINE_MINUTES} minutes.",
+            )
+            for device_id in due
+        })
@@ -0,0 +1,202 @@
+"""
+Server-sent events for device status and alerts (GET /api/events/, ASGI only).
+
+One publisher per process polls the device status change feed (api/changes.py)
+every SSE["POLL_SECONDS"], in the async DB thread pool, and fans the result out to
+every connected client, so the database cost does not grow with the number of open
+dashboards. Events:
+
+- device: a device's status row (as in /api/devices/status/) after it changed.
+- alert: an alert that became open.
+- alert_acknowledged: an open alert that was acknowledged.
+- resync: the client fell more than SSE["CLIENT_BUFFER"] events behind; its buffer was
+  dropped and it should reload its state (e.g. /api/devices/status/changes/ without a cursor).
+
+Alerts are found by comparing the open alerts of changed devices with the ones the
+publisher knew, so an alert opened and acknowledged within one poll is not reported.
+"""
+import asyncio
+import json
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import views
+from .changes import changed_device_ids, current_version
+from .models import Alert, Device
+from .services import HEALTH_OFFLINE_MINUTES
+
+logger = logging.getLogger(__name__)
+
+EVENT_DEVICE = "device"
+EVENT_ALERT = "alert"
+EVENT_ALERT_ACKNOWLEDGED = "alert_acknowledged"
+EVENT_RESYNC = "resync"
+
+
+def _setting(name, default):
+    return getattr(settings, "SSE", {}).get(name, default)
+
+
+def _alert_event(kind, alert):
+    zone = alert.device.zone if alert.device else None
+    return kind, {
+        "id": alert.pk,
+        "device_code": alert.device.code if alert.device else None,
+        "zone_id": zone.id if zone else None,
+        "facility_id": zone.facility_id if zone else None,
+        "severity": alert.severity,
+        "alert_type": alert.alert_type,
+        "message": alert.message,
+        "acknowledged_at": alert.acknowledged_at.isoformat() if alert.acknowledged_at else None,
+        "created_at": alert.created_at.isoformat(),
+    }
+
+
+class Subscriber:
+    """One client: its filters and a bounded event buffer."""
+
+    def __init__(self, facility_id=None, zone_id=None, severity=None):
+        self.facility_id = facility_id
+        self.zone_id = zone_id
+        self.severity = severity
+        self.max_buffer = _setting("CLIENT_BUFFER", 100)
+        self.queue = asyncio.Queue()
+
+    def wants(self, kind, data):
+        if kind == EVENT_RESYNC:
+            return True
+        if self.facility_id is not None and data.get("facility_id") != self.facility_id:
+            return False
+        if self.zone_id is not None and data.get("zone_id") != self.zone_id:
+            return False
+        if self.severity and kind != EVENT_DEVICE and data.get("severity") != self.severity:
+            return False
+        return True
+
+    def offer(self, kind, data, event_id):
+        if not self.wants(kind, data):
+            return
+        if self.queue.qsize() >= self.max_buffer:
+            # Slow consumer: drop what it has not read and tell it to reload instead.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            kind, data = EVENT_RESYNC, {}
+        self.queue.put_nowait((kind, data, event_id))
+
+
+class Publisher:
+    """Polls the change feed while at least one client is connected and fans events out."""
+
+    def __init__(self):
+        self.subscribers = set()
+        self._task = None
+        self._version = None
+        self._checked_at = None  # wall-clock time of the previous poll
+        self._rows = {}  # device_id -> last status row published
+        self._open = {}  # alert_id -> device_id, open alerts known
+
+    def subscribe(self, subscriber):
+        self.subscribers.add(subscriber)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    async def _run(self):
+        from .async_views import _db_executor  # async_views imports this module
+
+        interval = _setting("POLL_SECONDS", 1.0)
+        poll = sync_to_async(self._poll_in_thread, thread_sensitive=False, executor=_db_executor)
+        while self.subscribers:
+            try:
+                events, version = await poll()
+            except Exception:
+                logger.exception("Event stream poll failed")
+                events, version = [], None
+            for kind, data in events:
+                for subscriber in list(self.subscribers):
+                    subscriber.offer(kind, data, version)
+            await asyncio.sleep(interval)
+        self._version = None  # next start takes a new baseline
+
+    def _poll_in_thread(self):
+        close_old_connections()
+        return self.poll()
+
+    def poll(self):
+        """Events since the previous poll, and the version they bring the stream to."""
+        version = current_version()
+        now = timezone.now()
+        if self._version is None:
+            self._version = version
+            self._checked_at = now
+            self._rows = {}
+            self._open = dict(
+                Alert.objects.filter(acknowledged_at__isnull=True, device__isnull=False).values_list(
+                    "id", "device_id"
+                )
+            )
+            return [], version
+        device_ids = changed_device_ids(
+            self._version, version, timedelta(minutes=HEALTH_OFFLINE_MINUTES), self._checked_at, now
+        )
+        self._version = version
+        self._checked_at = now
+        if not device_ids:
+            return [], version
+
+        events = []
+        devices = Device.objects.select_related("zone", "zone__facility").filter(id__in=device_ids)
+        for row in views._device_status_rows(devices):
+            if self._rows.get(row["id"]) != row:
+                self._rows[row["id"]] = row
+                events.append((EVENT_DEVICE, row))
+
+        changed = set(device_ids)
+        alerts = Alert.objects.select_related("device", "device__zone")
+        now_open = {a.pk: a for a in alerts.filter(device_id__in=changed, acknowledged_at__isnull=True)}
+        closed = [pk for pk, device_id in self._open.items() if device_id in changed and pk not in now_open]
+        for alert in now_open.values():
+            if alert.pk not in self._open:
+                self._open[alert.pk] = alert.device_id
+                events.append(_alert_event(EVENT_ALERT, alert))
+        for alert in alerts.filter(pk__in=closed):
+            events.append(_alert_event(EVENT_ALERT_ACKNOWLEDGED, alert))
+        for pk in closed:
+            del self._open[pk]
+        return events, version
+
+
+publisher = Publisher()
+
+
+def format_event(kind, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {kind}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def stream(subscriber):
+    """SSE body for one client: its events as they come, a comment line as heartbeat."""
+    heartbeat = _setting("HEARTBEAT_SECONDS", 15)
+    publisher.subscribe(subscriber)
+    try:
+        yield f"retry: {int(_setting('RETRY_MS', 3000))}\n: connected\n\n"
+        while True:
+            try:
+                kind, data, event_id = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+            except TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield format_event(kind, data, event_id)
+    finally:
+        publisher.unsubscribe(subscriber)
@@ -0,0 +1,82 @@
+"""
+Process-local device registry: device code -> (device_id, zone_id, facility_id).
+
+Loaded lazily with one query, dropped by signals when a Device, ParkingZone or
+ParkingFacility is saved or deleted in this process, and reloaded after
+DEVICE_REGISTRY_TTL_SECONDS so changes made by other workers are picked up.
+Codes missing from the snapshot are looked up in the database before being reported
+as unknown, so a device added by another worker is never rejected.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+
+class DeviceRef(namedtuple("DeviceRef", ["device_id", "code", "zone_id", "facility_id"])):
+    __slots__ = ()
+
+    def as_device(self):
+        """Unsaved Device carrying the pk, for FK assignment without a query."""
+        from .models import Device
+
+        return Device(id=self.device_id, code=self.code, zone_id=self.zone_id)
+
+
+class DeviceRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None  # (by_code, by_id, loaded_at), swapped as a whole
+
+    def _ttl(self):
+        return getattr(settings, "DEVICE_REGISTRY_TTL_SECONDS", 60)
+
+    def _fetch(self, **filters):
+        from .models import Device
+
+        rows = Device.objects.filter(**filters).values_list(
+            "id", "code", "zone_id", "zone__facility_id"
+        )
+        return [DeviceRef(*row) for row in rows]
+
+    def _snapshot(self):
+        state = self._state
+        if state is not None and time.monotonic() - state[2] < self._ttl():
+            return state
+        with self._lock:
+            state = self._state
+            if state is None or time.monotonic() - state[2] >= self._ttl():
+                refs = self._fetch()
+                state = (
+                    {ref.code: ref for ref in refs},
+                    {ref.device_id: ref for ref in refs},
+                    time.monotonic(),
+                )
+                self._state = state
+            return state
+
+    def get_many(self, codes):
+        """Return {code: DeviceRef} for the codes that exist."""
+        by_code, by_id, _ = self._snapshot()
+        found = {code: by_code[code] for code in codes if code in by_code}
+        missing = set(codes) - found.keys()
+        if missing:
+            for ref in self._fetch(code__in=missing):
+                found[ref.code] = ref
+                by_code[ref.code] = ref
+                by_id[ref.device_id] = ref
+        return found
+
+    def get(self, code):
+        """Return the DeviceRef for code, or None if no such device."""
+        return self.get_many([code]).get(code)
+
+    def get_by_id(self, device_id):
+        return self._snapshot()[1].get(device_id)
+
+    def invalidate(self):
+        self._state = None
+
+
+registry = DeviceRegistry()
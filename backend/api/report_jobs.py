@@ -0,0 +1,402 @@
+"""
+Background report jobs (POST /api/reports/jobs/), for ranges too long to stream
+within a proxy timeout (settings.REPORT_JOBS).
+
+A job renders the usage report (api/reports.py) to a file in DIR: the web process
+runs jobs on WORKERS daemon threads, or, with WORKERS = 0, `manage.py run_report_jobs`
+runs them in its own process. Workers claim the oldest queued job with a conditional
+update, so several can share the queue. Each claim writes its own
+<id>.<format>.<started_at>.part and renames it when complete, so a finished job's
+artifact is always whole; progress and the outcome are only saved while the claim
+still holds the job. Clients poll the job for progress (rows written out of rows in
+range), then download the artifact with Range requests, so a cut download resumes
+where it stopped.
+
+Identical requests share a job: the cache (CACHE_ALIAS) maps a key built from the
+parameters and a fingerprint of the logs in range (their count and highest id, one
+indexed aggregate whatever the range length) to the job, so a repeat gets the queued,
+running or finished job, while logs added to or removed from the range make a new key
+and a fresh report.
+
+Requests and polls run sweep(): finished artifacts are deleted TTL_SECONDS after the
+job finished (the row stays, as expired), a running job that has not saved progress
+for STALE_SECONDS (its worker died) goes back to the queue, and this process's
+workers are woken if anything is queued, so jobs left over from a restart move on
+as soon as a client polls.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import http_date, quote_etag
+
+from . import reports
+from .models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "DIR": None,  # BASE_DIR / "report_artifacts"
+    "WORKERS": 1,
+    "TTL_SECONDS": 24 * 60 * 60,
+    "CACHE_ALIAS": "default",
+    "PROGRESS_SECONDS": 1.0,
+    "STALE_SECONDS": 5 * 60,
+}
+
+READ_BLOCK = 64 * 1024
+
+
+def job_settings():
+    return {**DEFAULTS, **getattr(settings, "REPORT_JOBS", {})}
+
+
+def artifacts_dir():
+    path = Path(job_settings()["DIR"] or Path(settings.BASE_DIR) / "report_artifacts")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def artifact_path(job):
+    return artifacts_dir() / f"{job.pk}.{job.format}"
+
+
+def part_path(job):
+    """Work file of one claim of the job (tagged with its started_at), renamed to artifact_path when done."""
+    return artifacts_dir() / f"{job.pk}.{job.format}.{int(job.started_at.timestamp() * 1e6)}.part"
+
+
+def _claimed(job):
+    """The job row while job's claim still holds it (not requeued and claimed again since)."""
+    return ReportJob.objects.filter(
+        pk=job.pk, status=ReportJob.STATUS_RUNNING, started_at=job.started_at
+    )
+
+
+def _params(job):
+    p = job.params
+    return date.fromisoformat(p["date_from"]), date.fromisoformat(p["date_to"]), p["facility"], p["zone"]
+
+
+def job_key(fmt, date_from, date_to, facility_id, zone_id):
+    """(key, rows in range): digest of the parameters and the count / highest id of the logs in range."""
+    fingerprint = reports.usage_logs(date_from, date_to, facility_id, zone_id).aggregate(
+        rows=Count("id"), last_id=Max("id")
+    )
+    key = hashlib.sha1(
+        repr(
+            (fmt, date_from.isoformat(), date_to.isoformat(), facility_id, zone_id,
+             fingerprint["rows"], fingerprint["last_id"])
+        ).encode()
+    ).hexdigest()
+    return key, fingerprint["rows"]
+
+
+def _live_job(job_id):
+    """The job if it can still be handed out: queued, running or done."""
+    if job_id is None:
+        return None
+    job = ReportJob.objects.filter(pk=job_id).first()
+    if job is None or job.status in (ReportJob.STATUS_FAILED, ReportJob.STATUS_EXPIRED):
+        return None
+    return job
+
+
+def request_job(fmt, date_from, date_to, facility_id=None, zone_id=None):
+    """(job, created): a new queued job, or the live job of an identical earlier request."""
+    sweep()
+    conf = job_settings()
+    cache = caches[conf["CACHE_ALIAS"]]
+    key, rows_total = job_key(fmt, date_from, date_to, facility_id, zone_id)
+    cache_key = f"report-job:{key}"
+    job = _live_job(cache.get(cache_key))
+    if job is not None:
+        return job, False
+
+    job = ReportJob.objects.create(
+        key=key,
+        format=fmt,
+        rows_total=rows_total,
+        params={
+            "date_from": date_from.isoformat(),
+            "date_to": date_to.isoformat(),
+            "facility": facility_id,
+            "zone": zone_id,
+        },
+    )
+    if not cache.add(cache_key, job.pk, conf["TTL_SECONDS"]):
+        # Another request got there between our lookup and now: use its job if it is live.
+        other = _live_job(cache.get(cache_key))
+        # A draining worker may already have claimed ours; then both stay.
+        if other is not None and ReportJob.objects.filter(pk=job.pk, status=ReportJob.STATUS_QUEUED).delete()[0]:
+            return other, False
+        cache.set(cache_key, job.pk, conf["TTL_SECONDS"])
+    transaction.on_commit(wake_workers)
+    return job, True
+
+
+def job_data(job):
+    if job.status == ReportJob.STATUS_DONE:
+        progress = 1.0
+    elif job.rows_total:
+        progress = round(min(job.rows_done / job.rows_total, 1.0), 4)
+    else:
+        progress = 0.0
+    return {
+        "id": job.pk,
+        "status": job.status,
+        "format": job.format,
+        "params": job.params,
+        "rows_total": job.rows_total,
+        "rows_done": job.rows_done,
+        "progress": progress,
+        "size": job.size,
+        "error": job.error or None,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "expires_at": job.expires_at.isoformat() if job.expires_at else None,
+        "download_url": (
+            f"/api/reports/jobs/{job.pk}/download/" if job.status == ReportJob.STATUS_DONE else None
+        ),
+    }
+
+
+class _Progress:
+    """Counts rows passing through and saves the count on the job at most every PROGRESS_SECONDS."""
+
+    def __init__(self, job):
+        self.job = job
+        self.every = job_settings()["PROGRESS_SECONDS"]
+        self.done = 0
+        self._next_save = time.monotonic() + self.every
+
+    def track(self, rows):
+        for row in rows:
+            yield row
+            self.done += 1
+            if not self.done % 1000 and time.monotonic() >= self._next_save:
+                _claimed(self.job).update(rows_done=self.done, updated_at=timezone.now())
+                self._next_save = time.monotonic() + self.every
+
+
+def claim_next():
+    """Mark the oldest queued job running and return it, or None when the queue is empty."""
+    while True:
+        job_id = (
+            ReportJob.objects.filter(status=ReportJob.STATUS_QUEUED)
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = ReportJob.objects.filter(pk=job_id, status=ReportJob.STATUS_QUEUED).update(
+            status=ReportJob.STATUS_RUNNING, started_at=now, updated_at=now
+        )
+        if claimed:
+            return ReportJob.objects.get(pk=job_id)
+
+
+def render(job):
+    """
+    Write a claimed job's artifact and record the outcome on the job. Every write is
+    conditional on the claim, so a worker whose job was requeued as stale and claimed
+    again can neither publish its file nor overwrite the new claim's outcome.
+    """
+    path = artifact_path(job)
+    part = part_path(job)
+    progress = _Progress(job)
+    try:
+        date_from, date_to, facility_id, zone_id = _params(job)
+        rows_total = reports.usage_logs(date_from, date_to, facility_id, zone_id).count()
+        _claimed(job).update(rows_total=rows_total, updated_at=timezone.now())
+        rows = progress.track(reports.usage_rows(date_from, date_to, facility_id, zone_id))
+        with open(part, "wb") as f:
+            for chunk in reports.encode_report(job.format, reports.USAGE_HEADER, rows):
+                f.write(chunk)
+        finished = timezone.now()
+        with transaction.atomic():
+            # The rename is inside the transaction: if it fails, the job is not DONE.
+            done = _claimed(job).update(
+                status=ReportJob.STATUS_DONE,
+                rows_done=progress.done,
+                size=part.stat().st_size,
+                finished_at=finished,
+                expires_at=finished + timedelta(seconds=job_settings()["TTL_SECONDS"]),
+            )
+            if done:
+                os.replace(part, path)
+    except Exception as exc:
+        logger.exception("Report job %s failed", job.pk)
+        part.unlink(missing_ok=True)
+        _claimed(job).update(
+            status=ReportJob.STATUS_FAILED,
+            rows_done=progress.done,
+            error=str(exc) or exc.__class__.__name__,
+            finished_at=timezone.now(),
+        )
+        return
+    if not done:
+        logger.warning("Report job %s was requeued while rendering; discarding this copy", job.pk)
+        part.unlink(missing_ok=True)
+
+
+def run_pending():
+    """Render queued jobs until none is left; returns how many were run."""
+    count = 0
+    while (job := claim_next()) is not None:
+        render(job)
+        count += 1
+    return count
+
+
+def expire_jobs():
+    """Delete the artifacts of finished jobs past expires_at and mark them expired."""
+    expired = list(
+        ReportJob.objects.filter(status=ReportJob.STATUS_DONE, expires_at__lte=timezone.now())
+    )
+    for job in expired:
+        artifact_path(job).unlink(missing_ok=True)
+    if expired:
+        ReportJob.objects.filter(pk__in=[job.pk for job in expired]).update(
+            status=ReportJob.STATUS_EXPIRED, size=None
+        )
+    return len(expired)
+
+
+def requeue_stale_jobs():
+    """Put running jobs without progress for STALE_SECONDS (their worker died) back in the queue."""
+    stale_before = timezone.now() - timedelta(seconds=job_settings()["STALE_SECONDS"])
+    requeued = 0
+    for job in ReportJob.objects.filter(status=ReportJob.STATUS_RUNNING, updated_at__lt=stale_before):
+        if _claimed(job).filter(updated_at__lt=stale_before).update(
+            status=ReportJob.STATUS_QUEUED, rows_done=0, started_at=None, updated_at=timezone.now()
+        ):
+            part_path(job).unlink(missing_ok=True)
+            requeued += 1
+    return requeued
+
+
+def sweep():
+    """Expire old artifacts, requeue abandoned jobs, and wake this process's workers if any job is queued."""
+    expire_jobs()
+    requeue_stale_jobs()
+    if ReportJob.objects.filter(status=ReportJob.STATUS_QUEUED).exists():
+        wake_workers()
+
+
+_wake = threading.Event()
+_workers = []
+_workers_lock = threading.Lock()
+
+
+def _work():
+    while True:
+        _wake.wait()
+        _wake.clear()
+        close_old_connections()
+        try:
+            run_pending()
+        except Exception:
+            logger.exception("Report worker failed")
+        finally:
+            close_old_connections()
+
+
+def wake_workers():
+    """Start this process's worker threads if needed and have them check the queue."""
+    workers = job_settings()["WORKERS"]
+    if not workers:
+        return  # run_report_jobs picks the job up
+    with _workers_lock:
+        while len(_workers) < workers:
+            thread = threading.Thread(target=_work, name=f"report-job-{len(_workers)}", daemon=True)
+            thread.start()
+            _workers.append(thread)
+    _wake.set()
+
+
+def _byte_range(header, size):
+    """
+    (first, last) byte of a single "bytes=" range, None to ignore the header (other
+    units, several ranges, bad syntax) or False when it cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    first, sep, last = spec.strip().partition("-")
+    if unit.strip().lower() != "bytes" or "," in spec or not sep:
+        return None
+    try:
+        if not first:  # suffix: the last n bytes
+            n = int(last)
+            return (max(size - n, 0), size - 1) if n > 0 and size else False
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return False
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _read(f, start, length):
+    try:
+        f.seek(start)
+        while length > 0:
+            block = f.read(min(READ_BLOCK, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+    finally:
+        f.close()
+
+
+def artifact_response(request, job):
+    """
+    The finished job's file, honouring a single Range (with If-Range) so downloads can
+    resume. Raises FileNotFoundError if the artifact is gone.
+    """
+    f = open(artifact_path(job), "rb")
+    size = os.fstat(f.fileno()).st_size
+    etag = quote_etag(f"report-{job.pk}-{size}")
+    last_modified = http_date(job.finished_at.timestamp())
+
+    byte_range = None
+    if request.headers.get("Range"):
+        if_range = request.headers.get("If-Range")
+        if if_range is None or if_range in (etag, last_modified):
+            byte_range = _byte_range(request.headers["Range"], size)
+    if byte_range is False:
+        f.close()
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    start, end = byte_range or (0, size - 1)
+    response = StreamingHttpResponse(
+        _read(f, start, end - start + 1),
+        status=206 if byte_range else 200,
+        content_type=reports.content_type(job.format),
+    )
+    response["Content-Length"] = str(end - start + 1)
+    if byte_range:
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = last_modified
+    response["Content-Disposition"] = f'attachment; filename="usage-{job.pk}.{job.format}"'
+    return response
@@ -0,0 +1,238 @@
+"""
+Usage report export (parking log rows), shared by /report-csv/ and /api/reports/usage/.
+
+Rows are streamed: log columns come in keyset pages of REPORT_CHUNK_SIZE, device /
+zone / facility names from one small lookup map, and the file is written out chunk by
+chunk through StreamingHttpResponse, so memory stays flat whatever the range and the
+header goes out before the first query finishes. Each page is a complete query, so
+no read stays open between chunks; on SQLite an open read would hold off writers for
+as long as the download lasts.
+Days are turned into timestamp ranges so the timestamp index is used.
+
+Formats (?format=): csv, ndjson (one JSON object per row), and csv.gz / ndjson.gz,
+gzip files compressed as they stream. csv and ndjson are also sent gzip-encoded
+(Content-Encoding) when the client accepts it; each chunk is flushed through the
+compressor, so compressed output goes out as steadily as the plain one.
+"""
+import csv
+import json
+import zlib
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+
+from .models import Device, ParkingLog
+
+USAGE_HEADER = ["date", "device_code", "zone_code", "facility", "is_occupied", "timestamp"]
+
+
+def _chunk_size():
+    return getattr(settings, "REPORT_CHUNK_SIZE", 2000)
+
+
+def _gzip_level():
+    return getattr(settings, "REPORT_GZIP_LEVEL", 6)
+
+
+def _parse_date(s):
+    if not s:
+        return None
+    try:
+        return datetime.strptime(s, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def usage_params(query):
+    """
+    (date_from, date_to, facility_id, zone_id) from query params; dates default to
+    today, ids to None. Raises ValueError for a non-integer facility / zone.
+    """
+    date_from = _parse_date(query.get("date_from")) or timezone.localdate()
+    date_to = _parse_date(query.get("date_to")) or date_from
+    if date_from > date_to:
+        date_from, date_to = date_to, date_from
+    facility_id = query.get("facility") or None
+    zone_id = query.get("zone") or None
+    return (
+        date_from,
+        date_to,
+        int(facility_id) if facility_id is not None else None,
+        int(zone_id) if zone_id is not None else None,
+    )
+
+
+def _device_names(facility_id, zone_id, device_id=None):
+    """{device_id: (code, zone code, facility name)}: one row per device, not per log."""
+    devices = Device.objects.all()
+    if device_id is not None:
+        devices = devices.filter(id=device_id)
+    if facility_id:
+        devices = devices.filter(zone__facility_id=facility_id)
+    if zone_id:
+        devices = devices.filter(zone_id=zone_id)
+    return {
+        device_id: (code, zone_code, facility_name)
+        for device_id, code, zone_code, facility_name in devices.values_list(
+            "id", "code", "zone__code", "zone__facility__name"
+        )
+    }
+
+
+def usage_logs(date_from, date_to, facility_id=None, zone_id=None, since=None):
+    """
+    Parking logs in the report: timestamps in [date_from, date_to] (local days), optionally
+    scoped. since (datetime) moves the start of the range up, for keyset pages.
+    """
+    start = since or timezone.make_aware(datetime.combine(date_from, datetime.min.time()))
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    logs = ParkingLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+    if facility_id:
+        logs = logs.filter(device__zone__facility_id=facility_id)
+    if zone_id:
+        logs = logs.filter(device__zone_id=zone_id)
+    return logs
+
+
+def usage_rows(date_from, date_to, facility_id=None, zone_id=None):
+    """Yield report rows (USAGE_HEADER order) for logs in [date_from, date_to], oldest first."""
+    columns = ("timestamp", "id", "device_id", "is_occupied")
+    names = _device_names(facility_id, zone_id)
+    chunk_size = _chunk_size()
+    page = usage_logs(date_from, date_to, facility_id, zone_id)
+    while True:
+        chunk = list(page.order_by("timestamp", "id").values_list(*columns)[:chunk_size])
+        for ts, _, device_id, is_occupied in chunk:
+            if device_id not in names:  # device added while streaming
+                names.update(_device_names(None, None, device_id))
+            code, zone_code, facility_name = names[device_id]
+            yield [ts.date(), code, zone_code, facility_name, is_occupied, ts.isoformat()]
+        if len(chunk) < chunk_size:
+            return
+        last_ts, last_id = chunk[-1][:2]
+        page = usage_logs(date_from, date_to, facility_id, zone_id, since=last_ts).filter(
+            Q(timestamp__gt=last_ts) | Q(id__gt=last_id)
+        )
+
+
+class _Lines:
+    """File-like target for csv.writer that collects written lines."""
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+
+def csv_chunks(header, rows):
+    """Yield CSV text: the header at once, then one string per REPORT_CHUNK_SIZE rows."""
+    out = _Lines()
+    writer = csv.writer(out)
+    writer.writerow(header)
+    yield out.lines.pop()
+    chunk_size = _chunk_size()
+    for row in rows:
+        writer.writerow(row)
+        if len(out.lines) >= chunk_size:
+            yield "".join(out.lines)
+            out.lines.clear()
+    if out.lines:
+        yield "".join(out.lines)
+
+
+def ndjson_chunks(header, rows):
+    """Yield NDJSON text, one object per row keyed by header, one string per REPORT_CHUNK_SIZE rows."""
+    encode = json.JSONEncoder(separators=(",", ":"), default=str).encode
+    chunk_size = _chunk_size()
+    lines = []
+    for row in rows:
+        lines.append(encode(dict(zip(header, row))))
+        if len(lines) >= chunk_size:
+            lines.append("")
+            yield "\n".join(lines)
+            lines.clear()
+    if lines:
+        lines.append("")
+        yield "\n".join(lines)
+
+
+def gzip_chunks(chunks, level=None):
+    """Gzip a stream of text chunks, flushing after each so every chunk is sent as it comes."""
+    compressor = zlib.compressobj(_gzip_level() if level is None else level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# format -> (content type, chunk writer)
+FORMATS = {
+    "csv": ("text/csv", csv_chunks),
+    "ndjson": ("application/x-ndjson", ndjson_chunks),
+}
+
+
+def format_names():
+    return [*FORMATS, *(f"{name}.gz" for name in FORMATS)]
+
+
+def content_type(fmt):
+    return "application/gzip" if fmt.endswith(".gz") else FORMATS[fmt][0]
+
+
+def encode_report(fmt, header, rows, gzip=False):
+    """Byte chunks of rows in fmt ("csv", "ndjson", or either with ".gz"); gzip compresses too."""
+    base, _, suffix = fmt.partition(".")
+    _, writer = FORMATS[base]
+    chunks = writer(header, rows)
+    if gzip or suffix == "gz":
+        return gzip_chunks(chunks)
+    return (chunk.encode() for chunk in chunks)
+
+
+def _accepts_gzip(request):
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip().lower() == "gzip":
+            q = params.replace(" ", "").lower().removeprefix("q=") or "1"
+            try:
+                return float(q) > 0
+            except ValueError:
+                return True
+    return False
+
+
+def usage_report_response(request):
+    """Streaming usage report for a plain Django request (?date_from, date_to, facility, zone, format)."""
+    fmt = (request.GET.get("format") or "csv").lower()
+    if fmt not in format_names():
+        return JsonResponse(
+            {"detail": f"format must be one of: {', '.join(format_names())}."}, status=400
+        )
+    try:
+        date_from, date_to, facility_id, zone_id = usage_params(request.GET)
+    except ValueError:
+        return JsonResponse({"detail": "facility and zone must be integer ids."}, status=400)
+
+    rows = usage_rows(date_from, date_to, facility_id, zone_id)
+    if fmt.endswith(".gz"):
+        response = StreamingHttpResponse(
+            encode_report(fmt, USAGE_HEADER, rows), content_type=content_type(fmt)
+        )
+    else:
+        content_encoded = _accepts_gzip(request)
+        response = StreamingHttpResponse(
+            encode_report(fmt, USAGE_HEADER, rows, gzip=content_encoded),
+            content_type=content_type(fmt),
+        )
+        if content_encoded:
+            response["Content-Encoding"] = "gzip"
+        patch_vary_headers(response, ("Accept-Encoding",))
+    response["Content-Disposition"] = f'attachment; filename="usage.{fmt}"'
+    return response
@@ -0,0 +1,172 @@
+"""
+Hourly parking rollups: per (device, hour) event count, occupied events and occupied seconds.
+
+Occupied seconds come from the intervals between consecutive events of a device
+while it was occupied, split across hours; the interval after a device's latest
+event is open and only counted once the next event arrives. Hours are UTC hour starts.
+
+In-order events (newer than the device's last stored event) are applied as deltas,
+a few queries per batch. A late or out-of-order event changes occupancy only up to
+the device's next stored event, so just those hours are recomputed from the log.
+rebuild_parking_rollups recomputes any range from scratch.
+"""
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import transaction
+
+from .models import ParkingHourlyRollup, ParkingLog
+
+HOUR = timedelta(hours=1)
+ROLLUP_FIELDS = ["event_count", "occupied_count", "occupied_seconds"]
+
+
+def floor_hour(ts):
+    return ts.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _add_occupied(acc, start, end, lo=None, hi=None):
+    """Spread the occupied interval [start, end), clipped to [lo, hi), over hour buckets."""
+    if lo is not None:
+        start = max(start, lo)
+    if hi is not None:
+        end = min(end, hi)
+    hour = floor_hour(start)
+    while start < end:
+        stop = min(hour + HOUR, end)
+        acc[hour][2] += (stop - start).total_seconds()
+        start = stop
+        hour += HOUR
+
+
+def tally_events(events, prev=None, next_event=None, lo=None, hi=None):
+    """
+    {hour: [event_count, occupied_count, occupied_seconds]} for one device.
+
+    events: (timestamp, is_occupied) in time order (any iterable). prev / next_event are
+    the device's events just outside the range, if any, so boundary intervals are counted;
+    occupied time is clipped to [lo, hi).
+    """
+    acc = defaultdict(lambda: [0, 0, 0.0])
+    last = prev
+    for ts, occupied in events:
+        bucket = acc[floor_hour(ts)]
+        bucket[0] += 1
+        if occupied:
+            bucket[1] += 1
+        if last is not None and last[1]:
+            _add_occupied(acc, last[0], ts, lo, hi)
+        last = (ts, occupied)
+    if next_event is not None and last is not None and last[1]:
+        _add_occupied(acc, last[0], next_event[0], lo, hi)
+    return acc
+
+
+def _rollup_rows(device_id, acc):
+    return [
+        ParkingHourlyRollup(
+            device_id=device_id,
+            hour=hour,
+            event_count=events,
+            occupied_count=occupied,
+            occupied_seconds=seconds,
+        )
+        for hour, (events, occupied, seconds) in acc.items()
+        if events or seconds
+    ]
+
+
+def recompute_parking_rollups(device_id, start=None, end=None):
+    """
+    Rebuild one device's rollups for the hours covering [start, end] from the log.
+    start=None means from the first event, end=None through the latest.
+    """
+    lo = floor_hour(start) if start is not None else None
+    hi = floor_hour(end) + HOUR if end is not None else None
+    logs = ParkingLog.objects.filter(device_id=device_id)
+    in_range = logs
+    rows = ParkingHourlyRollup.objects.filter(device_id=device_id)
+    prev = next_event = None
+    if lo is not None:
+        in_range = in_range.filter(timestamp__gte=lo)
+        rows = rows.filter(hour__gte=lo)
+        prev = logs.filter(timestamp__lt=lo).order_by("-timestamp").values_list(
+            "timestamp", "is_occupied"
+        ).first()
+    if hi is not None:
+        in_range = in_range.filter(timestamp__lt=hi)
+        rows = rows.filter(hour__lt=hi)
+        next_event = logs.filter(timestamp__gte=hi).order_by("timestamp").values_list(
+            "timestamp", "is_occupied"
+        ).first()
+    events = in_range.order_by("timestamp").values_list("timestamp", "is_occupied").iterator()
+    acc = tally_events(events, prev, next_event, lo, hi)
+    with transaction.atomic():
+        rows.delete()
+        ParkingHourlyRollup.objects.bulk_create(_rollup_rows(device_id, acc), batch_size=1000)
+
+
+def update_parking_rollups(logs, previous):
+    """
+    Apply newly inserted ParkingLog objects to the rollups, in the inserting transaction.
+    previous: {device_id: DeviceOccupancy} as read before this batch (the device's latest
+    stored event and its state).
+    """
+    by_device = defaultdict(list)
+    for log in logs:
+        by_device[log.device_id].append((log.timestamp, log.is_occupied))
+    late = []
+    in_order = {}
+    for device_id, events in by_device.items():
+        events.sort()
+        prev = previous.get(device_id)
+        if prev is not None and events[0][0] <= prev.last_event_at:
+            late.append((device_id, events[0][0], events[-1][0]))
+        else:
+            in_order[device_id] = events
+
+    if in_order:
+        _apply_in_order(in_order, previous)
+    for device_id, first, last in late:
+        following = ParkingLog.objects.filter(device_id=device_id, timestamp__gt=last).order_by(
+            "timestamp"
+        ).values_list("timestamp", flat=True).first()
+        recompute_parking_rollups(device_id, first, following or last)
+
+
+def _apply_in_order(by_device, previous):
+    """Add the batch's contribution for devices whose new events all follow the stored ones."""
+    deltas = {}
+    for device_id, events in by_device.items():
+        prev = previous.get(device_id)
+        if prev is not None:
+            prev = (prev.last_event_at, prev.is_occupied)
+        for hour, counts in tally_events(events, prev).items():
+            deltas[(device_id, hour)] = counts
+
+    existing = {
+        (device_id, hour): counts
+        for device_id, hour, *counts in ParkingHourlyRollup.objects.filter(
+            device_id__in=by_device.keys(),
+            hour__in={hour for _, hour in deltas},
+        ).values_list("device_id", "hour", *ROLLUP_FIELDS)
+    }
+    rows = []
+    for key, (events, occupied, seconds) in deltas.items():
+        base_events, base_occupied, base_seconds = existing.get(key, (0, 0, 0.0))
+        rows.append(
+            ParkingHourlyRollup(
+                device_id=key[0],
+                hour=key[1],
+                event_count=base_events + events,
+                occupied_count=base_occupied + occupied,
+                occupied_seconds=base_seconds + seconds,
+            )
+        )
+    ParkingHourlyRollup.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["device", "hour"],
+        update_fields=ROLLUP_FIELDS,
+        batch_size=1000,
+    )
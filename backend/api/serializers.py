@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from django.utils import timezone
-from .models import Device, Telemetry, ParkingLog, Target
+from .models import Target
+from .registry import registry
 
 
-def parse_timestamp(value):
-    """Parse ISO 8601 timestamp; reject future beyond 1 min tolerance."""
+def parse_timestamp(value, now=None):
+    """Parse ISO 8601 timestamp; reject future beyond 1 min tolerance (relative to now, default: current time)."""
     if isinstance(value, timezone.datetime):
         return value
     try:
@@ -12,7 +13,7 @@ def parse_timestamp(value):
         if dt.tzinfo is None:
             dt = timezone.make_aware(dt)
         # Reject future more than 1 minute
-        if dt > timezone.now() + timezone.timedelta(minutes=1):
+        if dt > (now or timezone.now()) + timezone.timedelta(minutes=1):
             raise serializers.ValidationError("Timestamp cannot be in the future.")
         return dt
     except Exception as e:
@@ -30,7 +31,7 @@ class TelemetrySerializer(serializers.Serializer):
         return parse_timestamp(value)
 
     def validate_device_code(self, value):
-        if not Device.objects.filter(code=value).exists():
+        if registry.get(value) is None:
             raise serializers.ValidationError("Device not found.")
         return value
 
@@ -55,11 +56,20 @@ class ParkingLogSerializer(serializers.Serializer):
         return parse_timestamp(value)
 
     def validate_device_code(self, value):
-        if not Device.objects.filter(code=value).exists():
+        if registry.get(value) is None:
             raise serializers.ValidationError("Device not found.")
         return value
 
 
+class ParkingLogBulkItemSerializer(serializers.Serializer):
+    device_code = serializers.CharField(max_length=128)
+    is_occupied = serializers.BooleanField()
+    timestamp = serializers.CharField()
+
+    def validate_timestamp(self, value):
+        return parse_timestamp(value)
+
+
 class TargetSerializer(serializers.Serializer):
     zone_id = serializers.IntegerField(required=False, allow_null=True)
     device_id = serializers.IntegerField(required=False, allow_null=True)
@@ -2,8 +2,18 @@
 Business logic: alert creation with dedup, thresholds.
 Document thresholds in README.
 """
+from datetime import timedelta
+
+from django.db.models import Count
 from django.utils import timezone
-from .models import Alert, Device, Telemetry
+from .alert_index import open_alerts
+from .changes import mark_changed
+from .models import Alert, DeviceLastSeen
+
+try:
+    import numpy as np
+except ImportError:  # optional; pure-Python fallback below
+    np = None
 
 # Thresholds (document in README)
 OFFLINE_MINUTES = 2
@@ -14,23 +24,36 @@ INVALID_VOLTAGE_MAX = 500  # V
 
 def acknowledge_offline_alerts_for_device(device):
     """When device sends telemetry again, mark open offline alerts as acknowledged."""
+    acknowledge_offline_alerts_for_devices([device.pk])
+
+
+def acknowledge_offline_alerts_for_devices(device_ids):
+    """Batch form of acknowledge_offline_alerts_for_device; no query unless one is open."""
+    device_ids = open_alerts.devices_with(device_ids, Alert.ALERT_OFFLINE)
+    if not device_ids:
+        return
     Alert.objects.filter(
-        device=device,
+        device_id__in=device_ids,
         alert_type=Alert.ALERT_OFFLINE,
         acknowledged_at__isnull=True,
     ).update(acknowledged_at=timezone.now())
+    open_alerts.discard((d, Alert.ALERT_OFFLINE) for d in device_ids)
+    mark_changed(device_ids)
 
 
 def get_or_create_alert(device, alert_type, severity, message):
     """Create alert only if no open (unacknowledged) alert for same device + type."""
     if not device:
         return None
+    if open_alerts.has(device.pk, alert_type):
+        return None
     exists = Alert.objects.filter(
         device=device,
         alert_type=alert_type,
         acknowledged_at__isnull=True,
     ).exists()
     if exists:
+        open_alerts.add([(device.pk, alert_type)])
         return None
     return Alert.objects.create(
         device=device,
@@ -42,42 +65,104 @@ def get_or_create_alert(device, alert_type, severity, message):
 
 def check_telemetry_alerts(device, voltage, current):
     """After saving telemetry: create high_power or invalid_data alerts if needed."""
-    power = voltage * current
-    if power > HIGH_POWER_WATTS:
-        get_or_create_alert(
-            device,
-            Alert.ALERT_HIGH_POWER,
+    create_alerts_bulk(evaluate_telemetry_alerts([device.pk], [voltage], [current]))
+
+
+def _first_index_per_device(device_ids, mask):
+    """{device_id: index of its first True in mask}, scanning in batch order."""
+    if np is not None:
+        hits = np.flatnonzero(mask)
+        if not len(hits):
+            return {}
+        devices, first = np.unique(device_ids[hits], return_index=True)
+        return {int(d): int(hits[i]) for d, i in zip(devices, first)}
+    first = {}
+    for i, hit in enumerate(mask):
+        if hit and device_ids[i] not in first:
+            first[device_ids[i]] = i
+    return first
+
+
+def evaluate_telemetry_alerts(device_ids, voltages, currents):
+    """
+    Apply the telemetry alert rules to a whole batch given as columns (parallel sequences).
+    Power and threshold masks are computed in one pass (NumPy when installed).
+    Returns {(device_id, alert_type): (severity, message)}: at most one candidate per
+    device and type, from its first breaching reading, as check_telemetry_alerts would.
+    """
+    if np is not None:
+        dev = np.asarray(device_ids, dtype=np.int64)
+        v = np.asarray(voltages, dtype=np.float64)
+        c = np.asarray(currents, dtype=np.float64)
+        high_power = v * c > HIGH_POWER_WATTS
+        invalid = (c > INVALID_CURRENT_MAX) | (v > INVALID_VOLTAGE_MAX)
+    else:
+        dev = device_ids
+        high_power = [vi * ci > HIGH_POWER_WATTS for vi, ci in zip(voltages, currents)]
+        invalid = [
+            ci > INVALID_CURRENT_MAX or vi > INVALID_VOLTAGE_MAX
+            for vi, ci in zip(voltages, currents)
+        ]
+
+    candidates = {}
+    for device_id, i in _first_index_per_device(dev, high_power).items():
+        power = voltages[i] * currents[i]
+        candidates[(device_id, Alert.ALERT_HIGH_POWER)] = (
             Alert.SEVERITY_CRITICAL,
             f"Power {power:.1f} W exceeds threshold {HIGH_POWER_WATTS} W",
         )
-    if current > INVALID_CURRENT_MAX or voltage > INVALID_VOLTAGE_MAX:
-        get_or_create_alert(
-            device,
-            Alert.ALERT_INVALID_DATA,
+    for device_id, i in _first_index_per_device(dev, invalid).items():
+        candidates[(device_id, Alert.ALERT_INVALID_DATA)] = (
             Alert.SEVERITY_WARNING,
-            f"Abnormal reading: voltage={voltage}, current={current}",
+            f"Abnormal reading: voltage={voltages[i]}, current={currents[i]}",
         )
+    return candidates
+
+
+def create_alerts_bulk(candidates):
+    """
+    Create alerts from {(device_id, alert_type): (severity, message)}, skipping pairs that
+    already have an open alert. Pairs known open in the index cost nothing; the rest take
+    one dedup query and one bulk_create. Returns created alerts.
+    """
+    candidates = {
+        pair: value for pair, value in candidates.items() if not open_alerts.has(*pair)
+    }
+    if not candidates:
+        return []
+    open_pairs = set(
+        Alert.objects.filter(
+            device_id__in={device_id for device_id, _ in candidates},
+            alert_type__in={alert_type for _, alert_type in candidates},
+            acknowledged_at__isnull=True,
+        ).values_list("device_id", "alert_type")
+    )
+    to_create = [
+        Alert(device_id=device_id, alert_type=alert_type, severity=severity, message=message)
+        for (device_id, alert_type), (severity, message) in candidates.items()
+        if (device_id, alert_type) not in open_pairs
+    ]
+    created = Alert.objects.bulk_create(to_create)
+    open_alerts.add(open_pairs)
+    open_alerts.add((a.device_id, a.alert_type) for a in created)
+    mark_changed(a.device_id for a in created)
+    return created
 
 
 def create_offline_alerts():
     """Create offline alert for each device with no telemetry in last OFFLINE_MINUTES."""
-    from django.db.models import Max
-
     cutoff = timezone.now() - timezone.timedelta(minutes=OFFLINE_MINUTES)
-    # Devices that have at least one telemetry
-    last_telemetry = (
-        Telemetry.objects.values("device_id")
-        .annotate(last=Max("timestamp"))
-        .filter(last__lt=cutoff)
+    # Devices that have at least one telemetry (indexed range on the last-seen table)
+    device_ids = DeviceLastSeen.objects.filter(last_telemetry_at__lt=cutoff).values_list(
+        "device_id", flat=True
     )
-    device_ids = [r["device_id"] for r in last_telemetry]
-    for device in Device.objects.filter(pk__in=device_ids):
-        get_or_create_alert(
-            device,
-            Alert.ALERT_OFFLINE,
+    create_alerts_bulk({
+        (device_id, Alert.ALERT_OFFLINE): (
             Alert.SEVERITY_WARNING,
             f"No telemetry received for {OFFLINE_MINUTES} minutes.",
         )
+        for device_id in device_ids
+    })
 
 
 # Health score: 0-100. Formula (document in README):
@@ -87,22 +172,53 @@ HEALTH_PENALTY_PER_ALERT = 10
 HEALTH_OFFLINE_PENALTY = 30
 
 
-def compute_health_score(device):
-    """Compute device health score 0-100. Not persisted; call from device status API."""
-    from django.db.models import Max, Count
-
+def health_score(open_count, last_telemetry_at, now=None):
+    """Health score 0-100 from a device's open alert count and last telemetry time (None: never)."""
     score = 100.0
     # Open alerts
-    open_count = Alert.objects.filter(
-        device=device, acknowledged_at__isnull=True
-    ).count()
     score -= open_count * HEALTH_PENALTY_PER_ALERT
     # Offline: no telemetry in last HEALTH_OFFLINE_MINUTES
-    last_ts = Telemetry.objects.filter(device=device).aggregate(Max("timestamp"))["timestamp__max"]
-    if last_ts:
-        from datetime import timedelta
-        if timezone.now() - last_ts > timedelta(minutes=HEALTH_OFFLINE_MINUTES):
+    if last_telemetry_at:
+        now = now or timezone.now()
+        if now - last_telemetry_at > timedelta(minutes=HEALTH_OFFLINE_MINUTES):
             score -= HEALTH_OFFLINE_PENALTY
     else:
         score -= HEALTH_OFFLINE_PENALTY  # Never sent telemetry
     return max(0, min(100, round(score, 1)))
+
+
+def open_alert_counts(device_ids=None):
+    """{device_id: open alert count}, from one grouped query; devices without open alerts are absent."""
+    alerts = Alert.objects.filter(acknowledged_at__isnull=True, device__isnull=False)
+    if device_ids is not None:
+        alerts = alerts.filter(device_id__in=device_ids)
+    return dict(
+        alerts.order_by().values("device_id").annotate(n=Count("id")).values_list("device_id", "n")
+    )
+
+
+def compute_health_scores(device_ids, last_telemetry=None, open_counts=None):
+    """
+    {device_id: health score} for many devices. last_telemetry ({device_id: last
+    telemetry time}) and open_counts (open_alert_counts()) are read when not given,
+    one query each, so scoring N devices costs at most two queries.
+    """
+    device_ids = list(device_ids)
+    if last_telemetry is None:
+        last_telemetry = dict(
+            DeviceLastSeen.objects.filter(device_id__in=device_ids).values_list(
+                "device_id", "last_telemetry_at"
+            )
+        )
+    if open_counts is None:
+        open_counts = open_alert_counts(device_ids)
+    now = timezone.now()
+    return {
+        device_id: health_score(open_counts.get(device_id, 0), last_telemetry.get(device_id), now)
+        for device_id in device_ids
+    }
+
+
+def compute_health_score(device):
+    """Compute device health score 0-100. Not persisted; call from device status API."""
+    return compute_health_scores([device.pk])[device.pk]
@@ -0,0 +1,132 @@
+"""
+Sessionization: turn each device's occupied/free transitions into ParkingSession rows.
+
+A session opens at the first occupied event after a free one and closes at the next
+free event; repeated events in the same state are ignored. Each device is read with
+one ordered streaming scan (.iterator()), so memory does not depend on history length.
+
+ParkingSessionCursor remembers, per device, the last event read, the highest log id
+seen and the session still open. A refresh reads only events after the cursor. If new
+rows arrived with timestamps at or before it (late events), the device is rewound to
+the start of the first session they can affect and rescanned from there.
+"""
+from django.db import transaction
+from django.db.models import Exists, F, Max, Min, OuterRef
+
+from .models import Device, ParkingLog, ParkingSession, ParkingSessionCursor
+
+BATCH_SIZE = 1000
+
+
+def _scan(device_id, events, open_since, emit):
+    """
+    Pair (timestamp, is_occupied, id) events, in time order, into sessions passed to emit.
+    Returns (open_since, last_event_at, max_id) for the cursor.
+    """
+    last_ts = None
+    max_id = 0
+    for ts, occupied, log_id in events:
+        if occupied:
+            if open_since is None:
+                open_since = ts
+        elif open_since is not None:
+            emit(ParkingSession(
+                device_id=device_id,
+                start=open_since,
+                end=ts,
+                duration_seconds=(ts - open_since).total_seconds(),
+            ))
+            open_since = None
+        last_ts = ts
+        max_id = max(max_id, log_id)
+    return open_since, last_ts, max_id
+
+
+def _refresh_device(device_id, cursor, first_new, new_max_id):
+    """Bring one device's sessions up to date; returns sessions created."""
+    logs = ParkingLog.objects.filter(device_id=device_id)
+    open_since = cursor.open_since
+    batch = []
+    created = 0
+
+    def emit(session):
+        nonlocal created
+        batch.append(session)
+        if len(batch) >= BATCH_SIZE:
+            ParkingSession.objects.bulk_create(batch)
+            created += len(batch)
+            batch.clear()
+
+    with transaction.atomic():
+        if cursor.last_event_at is not None and first_new <= cursor.last_event_at:
+            # Late events: drop every session they can touch and rescan from before them.
+            affected = ParkingSession.objects.filter(device_id=device_id, end__gte=first_new)
+            resume = min(
+                [first_new]
+                + ([open_since] if open_since is not None else [])
+                + [affected.aggregate(s=Min("start"))["s"] or first_new]
+            )
+            affected.delete()
+            open_since = None
+            logs = logs.filter(timestamp__gte=resume)
+        elif cursor.last_event_at is not None:
+            logs = logs.filter(timestamp__gt=cursor.last_event_at)
+
+        events = logs.order_by("timestamp", "id").values_list("timestamp", "is_occupied", "id")
+        open_since, last_ts, max_id = _scan(
+            device_id, events.iterator(chunk_size=BATCH_SIZE), open_since, emit
+        )
+        ParkingSession.objects.bulk_create(batch)
+        created += len(batch)
+
+        cursor.open_since = open_since
+        if last_ts is not None:
+            cursor.last_event_at = max(last_ts, cursor.last_event_at or last_ts)
+        cursor.last_log_id = max(cursor.last_log_id, max_id, new_max_id)
+        cursor.save()
+    return created
+
+
+def refresh_sessions(device_ids=None, full=False):
+    """
+    Incrementally refresh sessions (all devices, or device_ids). full=True drops them
+    and rebuilds from the whole log. Returns (devices refreshed, sessions created).
+    """
+    cursors = ParkingSessionCursor.objects.all()
+    logs = ParkingLog.objects.all()
+    if device_ids is not None:
+        cursors = cursors.filter(device_id__in=device_ids)
+        logs = logs.filter(device_id__in=device_ids)
+    if full:
+        with transaction.atomic():
+            sessions = ParkingSession.objects.all()
+            if device_ids is not None:
+                sessions = sessions.filter(device_id__in=device_ids)
+            sessions.delete()
+            cursors.delete()
+    cursors = {c.device_id: c for c in cursors}
+
+    # Devices never scanned, then rows the others have not read yet (id above their
+    # cursor) in one grouped query over the tail of the log.
+    unseen = Device.objects.filter(session_cursor__isnull=True).filter(
+        Exists(ParkingLog.objects.filter(device_id=OuterRef("pk")))
+    )
+    if device_ids is not None:
+        unseen = unseen.filter(id__in=device_ids)
+    pending = [(device_id, None, 0) for device_id in unseen.values_list("id", flat=True)]
+    if cursors:
+        pending += (
+            logs.filter(id__gt=min(c.last_log_id for c in cursors.values()))
+            .filter(id__gt=F("device__session_cursor__last_log_id"))
+            .order_by()
+            .values("device_id")
+            .annotate(first=Min("timestamp"), max_id=Max("id"))
+            .values_list("device_id", "first", "max_id")
+        )
+    devices = 0
+    created = 0
+    for device_id, first_new, new_max_id in pending:
+        cursor = cursors.get(device_id) or ParkingSessionCursor(device_id=device_id)
+        created += _refresh_device(device_id, cursor, first_new, new_max_id)
+        devices += 1
+    return devices, created
@@ -0,0 +1,88 @@
+"""Signal handlers keeping caches, zone counters and change versions in step with model changes."""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .alert_index import open_alerts
+from .changes import mark_changed
+from .dashboard_cache import touch_days
+from .models import Alert, Device, ParkingFacility, ParkingZone, Target, ZoneOccupancy
+from .occupancy import sync_zone_occupancy
+from .registry import registry
+
+
+@receiver(post_save, sender=Device)
+@receiver(post_delete, sender=Device)
+@receiver(post_save, sender=ParkingZone)
+@receiver(post_delete, sender=ParkingZone)
+@receiver(post_save, sender=ParkingFacility)
+@receiver(post_delete, sender=ParkingFacility)
+def invalidate_device_registry(sender, **kwargs):
+    registry.invalidate()
+
+
+@receiver(post_save, sender=ParkingZone)
+def create_zone_occupancy(sender, instance, created, **kwargs):
+    if created:
+        ZoneOccupancy.objects.get_or_create(zone=instance)
+
+
+@receiver(pre_save, sender=Device)
+def remember_device_zone(sender, instance, **kwargs):
+    instance._previous_zone_id = (
+        Device.objects.filter(pk=instance.pk).values_list("zone_id", flat=True).first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Device)
+@receiver(post_delete, sender=Device)
+def resync_zone_slots(sender, instance, **kwargs):
+    zone_ids = {instance.zone_id, getattr(instance, "_previous_zone_id", None)} - {None}
+    sync_zone_occupancy(zone_ids)
+
+
+@receiver(post_save, sender=Alert)
+def track_saved_alert(sender, instance, **kwargs):
+    if instance.device_id is None:
+        return
+    pair = (instance.device_id, instance.alert_type)
+    if instance.acknowledged_at is None:
+        open_alerts.add([pair])
+    else:
+        open_alerts.discard([pair])
+
+
+@receiver(post_delete, sender=Alert)
+def track_deleted_alert(sender, instance, **kwargs):
+    if instance.device_id is not None:
+        open_alerts.discard([(instance.device_id, instance.alert_type)])
+
+
+@receiver(post_save, sender=Device)
+def mark_device_changed(sender, instance, **kwargs):
+    mark_changed([instance.pk])
+
+
+@receiver(post_save, sender=Alert)
+@receiver(post_delete, sender=Alert)
+def mark_alert_device_changed(sender, instance, origin=None, **kwargs):
+    """Bulk alert writes in services.py mark their devices themselves."""
+    if origin is not None and getattr(origin, "model", type(origin)) is not Alert:
+        return  # cascade from deleting the device / zone / facility
+    mark_changed([instance.device_id])
+
+
+@receiver(pre_save, sender=Target)
+def remember_target_date(sender, instance, **kwargs):
+    instance._previous_date = (
+        Target.objects.filter(pk=instance.pk).values_list("date", flat=True).first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Target)
+@receiver(post_delete, sender=Target)
+def invalidate_target_day(sender, instance, **kwargs):
+    touch_days({instance.date, getattr(instance, "_previous_date", None)} - {None})
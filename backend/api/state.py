@@ -0,0 +1,109 @@
+"""
+Maintained per-device state, updated by the ingestion paths so that reads
+(offline detection, device status, health, dashboard) are indexed lookups instead
+of aggregates over the telemetry and parking log tables.
+"""
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Max, Q, Value, When
+from django.utils import timezone
+
+from .changes import next_version
+from .dashboard_cache import touch_timestamps
+from .models import DeviceLastSeen, ParkingLog, Telemetry
+from .occupancy import occupancy_for, update_occupancy
+from .rollups import update_parking_rollups
+
+LAST_TELEMETRY = "last_telemetry_at"
+LAST_PARKING_LOG = "last_parking_log_at"
+
+# Devices per conditional UPDATE in touch_last_seen.
+TOUCH_BATCH = 200
+
+
+def latest_by_device(rows):
+    """{device_id: max timestamp} from (device_id, timestamp) pairs."""
+    latest = {}
+    for device_id, ts in rows:
+        if device_id not in latest or ts > latest[device_id]:
+            latest[device_id] = ts
+    return latest
+
+
+def touch_last_seen(field, latest):
+    """
+    Upsert DeviceLastSeen.<field> from {device_id: timestamp}, never moving it backwards,
+    so late or out-of-order data is harmless. Rows that move get a new change version.
+    The "is it newer" test is part of each UPDATE's WHERE clause, so concurrent writers
+    (sync views, the async executor, the write-behind flusher) cannot move it back.
+    A few queries per call whatever its size.
+    """
+    if not latest:
+        return
+    current = dict(
+        DeviceLastSeen.objects.filter(device_id__in=latest.keys()).values_list("device_id", field)
+    )
+    # Values only grow, so rows already at or past ts can be skipped without locking.
+    moved = {
+        device_id: ts
+        for device_id, ts in latest.items()
+        if current.get(device_id) is None or current[device_id] < ts
+    }
+    if not moved:
+        return
+    version = next_version()
+    missing = moved.keys() - current.keys()
+    if missing:
+        # A concurrent insert wins the conflict; the conditional update below then applies.
+        DeviceLastSeen.objects.bulk_create(
+            [DeviceLastSeen(device_id=d, change_version=version, **{field: moved[d]}) for d in missing],
+            ignore_conflicts=True,
+        )
+    items = list(moved.items())
+    now = timezone.now()
+    for i in range(0, len(items), TOUCH_BATCH):
+        batch = items[i:i + TOUCH_BATCH]
+        newer = Q()
+        for device_id, ts in batch:
+            newer |= Q(device_id=device_id) & (Q(**{f"{field}__isnull": True}) | Q(**{f"{field}__lt": ts}))
+        DeviceLastSeen.objects.filter(newer).update(
+            **{field: Case(*(When(device_id=d, then=Value(ts)) for d, ts in batch), output_field=DateTimeField())},
+            updated_at=now,
+            change_version=version,
+        )
+
+
+def record_parking_logs(logs):
+    """
+    Update rollups, occupancy, last-seen and dashboard cache versions for newly
+    inserted ParkingLog objects, in the insert transaction.
+    """
+    previous = occupancy_for({o.device_id for o in logs})
+    update_parking_rollups(logs, previous)
+    update_occupancy(logs, previous)
+    touch_timestamps({o.timestamp for o in logs})
+    touch_last_seen(LAST_PARKING_LOG, latest_by_device((o.device_id, o.timestamp) for o in logs))
+
+
+def rebuild_last_seen():
+    """Recompute DeviceLastSeen from full telemetry and parking log history. Returns row count."""
+    telemetry = dict(
+        Telemetry.objects.values("device_id").annotate(ts=Max("timestamp")).values_list("device_id", "ts")
+    )
+    logs = dict(
+        ParkingLog.objects.values("device_id").annotate(ts=Max("timestamp")).values_list("device_id", "ts")
+    )
+    rows = [
+        DeviceLastSeen(
+            device_id=device_id,
+            last_telemetry_at=telemetry.get(device_id),
+            last_parking_log_at=logs.get(device_id),
+        )
+        for device_id in telemetry.keys() | logs.keys()
+    ]
+    with transaction.atomic():
+        version = next_version()
+        for row in rows:
+            row.change_version = version
+        DeviceLastSeen.objects.all().delete()
+        DeviceLastSeen.objects.bulk_create(rows)
+    return len(rows)
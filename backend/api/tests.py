@@ -1,3 +1,254 @@
+import random
+from datetime import timedelta
+from unittest import mock
+
+from django.db.models import Max
 from django.test import TestCase
+from django.utils import timezone
+
+from .ingestion import ingest_parking_log_batch, ingest_telemetry_batch
+from .models import (
+    Alert,
+    Device,
+    DeviceLastSeen,
+    DeviceOccupancy,
+    ParkingFacility,
+    ParkingHourlyRollup,
+    ParkingSession,
+    ParkingZone,
+    Telemetry,
+    ZoneOccupancy,
+)
+from .occupancy import rebuild_occupancy
+from .rollups import recompute_parking_rollups
+from .services import HEALTH_OFFLINE_MINUTES, health_score
+from .sessions import refresh_sessions
+from .state import rebuild_last_seen
+
+
+class IngestedLogsTestCase(TestCase):
+    """
+    Feeds parking logs and telemetry through batch ingestion, out of order or with late
+    events mixed in, so incrementally maintained state can be compared to a rebuild.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        facility = ParkingFacility.objects.create(name="Test facility", code="TF")
+        cls.zone = ParkingZone.objects.create(facility=facility, name="Level 1", code="L1")
+        cls.devices = [
+            Device.objects.create(zone=cls.zone, code=f"TEST-L1-S{i:03d}") for i in range(4)
+        ]
+
+    def ingest_logs(self, seed, count=80, batch_size=7, late_ratio=0.15):
+        rng = random.Random(seed)
+        # Each seed gets its own two days, later than the previous seed's, so several
+        # seeds can run in one test and each ends with fresh current state.
+        start = timezone.now().replace(microsecond=0) - timedelta(days=60 - 2 * seed)
+        events = sorted(
+            {
+                (start + timedelta(seconds=rng.randrange(2 * 86400)), rng.choice(self.devices).code)
+                for _ in range(count)
+            }
+        )
+        # Hold some events back and deliver them a few batches later.
+        held, ordered = [], []
+        for ts, code in events:
+            (held if rng.random() < late_ratio else ordered).append(
+                {"device_code": code, "is_occupied": rng.random() < 0.5, "timestamp": ts}
+            )
+        for i in range(0, len(ordered), batch_size):
+            batch = ordered[i:i + batch_size]
+            if held and rng.random() < 0.5:
+                batch += [held.pop(rng.randrange(len(held))) for _ in range(min(2, len(held)))]
+            created, errors = ingest_parking_log_batch(list(enumerate(batch)))
+            self.assertEqual(errors, [])
+            self.after_batch()
+        if held:
+            ingest_parking_log_batch(list(enumerate(held)))
+            self.after_batch()
+
+    def after_batch(self):
+        """Hook for state refreshed outside the ingest transaction."""
+
+    def ingest_telemetry(self, device, newest, count=60, seed=0):
+        """Telemetry every 10 s up to newest, delivered in shuffled batches (late rows included)."""
+        rng = random.Random(seed)
+        rows = [
+            {
+                "device_code": device.code,
+                "voltage": 230.0,
+                "current": rng.choice([1.0, 60.0]),  # some readings raise high-power alerts
+                "power_factor": 0.9,
+                "timestamp": newest - timedelta(seconds=10 * i),
+            }
+            for i in range(count)
+        ]
+        rng.shuffle(rows)
+        for i in range(0, len(rows), 9):
+            created, errors = ingest_telemetry_batch(list(enumerate(rows[i:i + 9])))
+            self.assertEqual(errors, [])
+
+
+class ParkingRollupTests(IngestedLogsTestCase):
+    def rollups(self):
+        return {
+            (device_id, hour): (events, occupied, round(seconds, 6))
+            for device_id, hour, events, occupied, seconds in ParkingHourlyRollup.objects.values_list(
+                "device_id", "hour", "event_count", "occupied_count", "occupied_seconds"
+            )
+        }
+
+    def test_incremental_rollups_match_rebuild(self):
+        for seed in range(10):
+            with self.subTest(seed=seed):
+                self.ingest_logs(seed)
+                incremental = self.rollups()
+                for device in self.devices:
+                    recompute_parking_rollups(device.pk)
+                self.assertEqual(incremental, self.rollups())
+
+
+class OccupancyTests(IngestedLogsTestCase):
+    def occupancy(self):
+        devices = set(
+            DeviceOccupancy.objects.values_list("device_id", "is_occupied", "since", "last_event_at")
+        )
+        zones = set(ZoneOccupancy.objects.values_list("zone_id", "occupied", "slot_count"))
+        return devices, zones
+
+    def test_incremental_occupancy_matches_rebuild(self):
+        for seed in range(10):
+            with self.subTest(seed=seed):
+                self.ingest_logs(seed)
+                incremental = self.occupancy()
+                rebuild_occupancy()
+                self.assertEqual(incremental, self.occupancy())
+
+
+class ParkingSessionTests(IngestedLogsTestCase):
+    def after_batch(self):
+        refresh_sessions()
+
+    def sessions(self):
+        return sorted(ParkingSession.objects.values_list("device_id", "start", "end", "duration_seconds"))
+
+    def test_incremental_sessions_match_rebuild(self):
+        for seed in range(10):
+            with self.subTest(seed=seed):
+                self.ingest_logs(seed)
+                incremental = self.sessions()
+                refresh_sessions(full=True)
+                self.assertEqual(incremental, self.sessions())
+
+
+class DeviceStatusTests(IngestedLogsTestCase):
+    def test_status_rows_match_raw_tables(self):
+        now = timezone.now().replace(microsecond=0)
+        self.ingest_logs(seed=0)
+        self.ingest_telemetry(self.devices[0], now - timedelta(seconds=30))
+        self.ingest_telemetry(self.devices[1], now - timedelta(hours=1), seed=1)
+        Alert.objects.filter(device=self.devices[1]).update(acknowledged_at=now)
+        # devices[0]: fresh with an open alert; [1]: stale, alerts acknowledged;
+        # [2] and [3]: parking logs only, never any telemetry.
+
+        response = self.client.get("/api/devices/status/", {"zone": self.zone.pk})
+        self.assertEqual(response.status_code, 200)
+        rows = {row["id"]: row for row in response.json()}
+        self.assertEqual(set(rows), {d.pk for d in self.devices})
+
+        last_telemetry = dict(
+            Telemetry.objects.values("device_id").annotate(ts=Max("timestamp")).values_list("device_id", "ts")
+        )
+        for device in self.devices:
+            with self.subTest(device=device.code):
+                open_alerts = Alert.objects.filter(device=device, acknowledged_at__isnull=True).count()
+                self.assertEqual(
+                    rows[device.pk]["health_score"],
+                    health_score(open_alerts, last_telemetry.get(device.pk)),
+                )
+                expected = last_telemetry.get(device.pk)
+                self.assertEqual(
+                    rows[device.pk]["last_telemetry_at"], expected.isoformat() if expected else None
+                )
+
+    def test_incremental_last_seen_matches_rebuild(self):
+        now = timezone.now().replace(microsecond=0)
+        self.ingest_logs(seed=0)
+        for i, device in enumerate(self.devices[:3]):
+            self.ingest_telemetry(device, now - timedelta(minutes=7 * i), seed=i)
+
+        def last_seen():
+            return set(
+                DeviceLastSeen.objects.values_list("device_id", "last_telemetry_at", "last_parking_log_at")
+            )
+
+        incremental = last_seen()
+        rebuild_last_seen()
+        self.assertEqual(incremental, last_seen())
+
+
+class ChangeFeedTests(IngestedLogsTestCase):
+    url = "/api/devices/status/changes/"
+
+    def changes(self, cursor=""):
+        response = self.client.get(self.url, {"cursor": cursor, "zone": self.zone.pk})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_applied_changes_match_full_fetch(self):
+        now = timezone.now().replace(microsecond=0)
+        first = self.changes()
+        self.assertTrue(first["full"])
+        state = {row["id"]: row for row in first["devices"]}
+        cursor = first["cursor"]
+
+        def poll():
+            nonlocal cursor
+            page = self.changes(cursor)
+            self.assertFalse(page["full"])
+            state.update((row["id"], row) for row in page["devices"])
+            cursor = page["cursor"]
+            return page["devices"]
+
+        self.assertEqual(poll(), [])
+        steps = [
+            lambda: self.ingest_telemetry(self.devices[0], now - timedelta(seconds=20)),
+            lambda: self.ingest_logs(seed=0),
+            lambda: self.ingest_telemetry(self.devices[1], now - timedelta(minutes=30), seed=1),
+            lambda: self.client.patch(
+                f"/api/alerts/{Alert.objects.filter(device=self.devices[0]).first().pk}/acknowledge/"
+            ),
+            lambda: Device.objects.create(zone=self.zone, code="TEST-L1-S100"),
+        ]
+        for step in steps:
+            step()
+            self.assertNotEqual(poll(), [])
+        self.assertEqual(state, {row["id"]: row for row in self.changes()["devices"]})
+
+    def test_device_going_quiet_is_reported_once(self):
+        now = timezone.now()
+        self.ingest_telemetry(self.devices[0], now - timedelta(minutes=HEALTH_OFFLINE_MINUTES - 1))
+        cursor = self.changes()["cursor"]
+        reported = []
+        for minutes in (2, 3, 4, 5):
+            with mock.patch("django.utils.timezone.now", return_value=now + timedelta(minutes=minutes)):
+                page = self.changes(cursor)
+            cursor = page["cursor"]
+            reported.append([row["id"] for row in page["devices"]])
+        self.assertEqual(reported, [[self.devices[0].pk], [], [], []])
 
-# Create your tests here.
+    def test_rejects_versions_it_did_not_issue(self):
+        first = self.changes()
+        version = first["version"]
+        self.assertEqual(self.changes(first["cursor"])["devices"], [])
+        self.assertEqual(self.client.get(self.url, {"since": version}).json()["devices"], [])
+        for since in (-1, "abc", version + 1, 10 ** 30):
+            with self.subTest(since=since):
+                response = self.client.get(self.url, {"since": since})
+                self.assertEqual(response.status_code, 400)
+        checked_us = first["cursor"].partition(".")[2]
+        for cursor in ("abc", f"{version + 1}.{checked_us}", f"{version}.{10 ** 17}", f"{version}.{10 ** 30}"):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.url, {"cursor": cursor})
+                self.assertEqual(response.status_code, 400)
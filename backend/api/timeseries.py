@@ -0,0 +1,178 @@
+"""
+Telemetry read API for charts (GET /api/devices/<code>/telemetry/), three modes:
+
+- buckets: min / max / avg per fixed-size time bucket, grouped in the database.
+  The bucket is the smallest of BUCKET_SECONDS that keeps the range within
+  TELEMETRY_SERIES_MAX_POINTS buckets, so a year of 10 s readings is a few hundred rows.
+- lttb: Largest-Triangle-Three-Buckets downsampling to a fixed number of actual
+  readings, which keeps the visual shape (peaks, dips) of one metric. Readings are
+  streamed, and only two LTTB buckets are held in memory at a time.
+- raw: readings in time order, paged by keyset (timestamp of the last row; device +
+  timestamp is unique), so deep pages cost the same as the first.
+"""
+from datetime import datetime, timezone as dt_timezone
+from itertools import pairwise
+
+from django.conf import settings
+from django.db.models import Avg, Count, F, FloatField, Func, IntegerField, Max, Min
+
+from .models import Telemetry
+
+BUCKET_SECONDS = [
+    10, 30, 60, 5 * 60, 15 * 60, 30 * 60,
+    3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 7 * 86400,
+]
+METRICS = ("voltage", "current", "power_factor", "power")
+
+
+def max_points():
+    return getattr(settings, "TELEMETRY_SERIES_MAX_POINTS", 1000)
+
+
+class EpochBucket(Func):
+    """Start (Unix seconds) of the fixed-size bucket a datetime column falls in."""
+
+    output_field = IntegerField()
+    template = "(FLOOR(EXTRACT(EPOCH FROM %(expressions)s) / %(seconds)s) * %(seconds)s)"
+
+    def __init__(self, expression, seconds):
+        super().__init__(expression, seconds=int(seconds))
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="((CAST(strftime('%%%%s', %(expressions)s) AS INTEGER) / %(seconds)s) * %(seconds)s)",
+            **extra_context,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="((UNIX_TIMESTAMP(%(expressions)s) DIV %(seconds)s) * %(seconds)s)",
+            **extra_context,
+        )
+
+
+def _power():
+    return F("voltage") * F("current") * F("power_factor")
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, tz=dt_timezone.utc).isoformat()
+
+
+def choose_bucket(start, end):
+    """Smallest bucket (seconds) giving at most max_points() buckets over [start, end], or None."""
+    span = (end - start).total_seconds()
+    for seconds in BUCKET_SECONDS:
+        if span / seconds <= max_points():
+            return seconds
+    return None
+
+
+def bucketed_series(device_id, start, end, seconds):
+    """[{t, count, <metric>_min / _max / _avg}] per non-empty bucket, oldest first."""
+    aggregates = {"count": Count("id")}
+    for metric in METRICS:
+        column = _power() if metric == "power" else F(metric)
+        aggregates[f"{metric}_min"] = Min(column, output_field=FloatField())
+        aggregates[f"{metric}_max"] = Max(column, output_field=FloatField())
+        aggregates[f"{metric}_avg"] = Avg(column, output_field=FloatField())
+    rows = (
+        Telemetry.objects.filter(device_id=device_id, timestamp__gte=start, timestamp__lte=end)
+        .annotate(bucket=EpochBucket("timestamp", seconds))
+        .values("bucket")
+        .annotate(**aggregates)
+        .order_by("bucket")
+    )
+    return [{"t": _iso(row.pop("bucket")), **row} for row in rows]
+
+
+def _reading(row):
+    _, ts, voltage, current, power_factor = row
+    return {
+        "t": ts.isoformat(),
+        "voltage": voltage,
+        "current": current,
+        "power_factor": power_factor,
+        "power": voltage * current * power_factor,
+    }
+
+
+def _lttb_buckets(rows, n, threshold):
+    """Group n time-ordered points into LTTB buckets: first point, threshold - 2 buckets, last point."""
+    every = (n - 2) / (threshold - 2)
+    current, index = [], 0
+    last = None
+    for i, point in enumerate(rows):
+        if i == 0:
+            yield [point]
+            continue
+        if i >= n - 1:
+            last = point  # rows that arrived after the count still end the series
+            continue
+        bucket = min(int((i - 1) / every) + 1, threshold - 2)
+        if bucket != index and current:
+            yield current
+            current = []
+        index = bucket
+        current.append(point)
+    if current:
+        yield current
+    if last is not None:
+        yield [last]
+
+
+def lttb_series(device_id, start, end, threshold, metric):
+    """
+    Up to threshold readings chosen by LTTB on metric, oldest first. Each point is a
+    full reading (t, voltage, current, power_factor, power).
+    """
+    readings = Telemetry.objects.filter(
+        device_id=device_id, timestamp__gte=start, timestamp__lte=end
+    ).order_by("timestamp")
+    n = readings.count()
+    rows = (
+        readings.values_list("id", "timestamp", "voltage", "current", "power_factor")
+        .iterator(chunk_size=2000)
+    )
+    if n <= max(threshold, 2):
+        return [_reading(row) for row in rows]
+
+    # (x, y, row) per reading; the response dict is only built for selected readings.
+    if metric == "power":
+        points = ((r[1].timestamp(), r[2] * r[3] * r[4], r) for r in rows)
+    else:
+        column = ("voltage", "current", "power_factor").index(metric) + 2
+        points = ((r[1].timestamp(), r[column], r) for r in rows)
+
+    buckets = _lttb_buckets(points, n, threshold)
+    selected = next(buckets)[0]
+    out = [_reading(selected[2])]
+    following = [selected]
+    for bucket, following in pairwise(buckets):
+        avg_x = sum(p[0] for p in following) / len(following)
+        avg_y = sum(p[1] for p in following) / len(following)
+        ax, ay = selected[0], selected[1]
+        dx, dy = ax - avg_x, avg_y - ay
+        selected = max(bucket, key=lambda p: abs(dx * (p[1] - ay) - (ax - p[0]) * dy))
+        out.append(_reading(selected[2]))
+    out.append(_reading(following[-1][2]))
+    return out
+
+
+def raw_page(device_id, start, end, after, limit):
+    """(readings, next cursor or None): up to limit readings after the cursor timestamp."""
+    readings = Telemetry.objects.filter(device_id=device_id, timestamp__gte=start, timestamp__lte=end)
+    if after is not None:
+        readings = readings.filter(timestamp__gt=after)
+    rows = list(
+        readings.order_by("timestamp").values_list(
+            "id", "timestamp", "voltage", "current", "power_factor"
+        )[: limit + 1]
+    )
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return [_reading(row) for row in rows], (rows[-1][1].isoformat() if more else None)
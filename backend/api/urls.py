@@ -1,19 +1,35 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path("health/", views.health),
     path("telemetry/", views.telemetry_create),
     path("telemetry/bulk/", views.telemetry_bulk_create),
+    path("telemetry/ndjson/", views.telemetry_ndjson_create),
     path("parking-log/", views.parking_log_create),
+    path("parking-log/bulk/", views.parking_log_bulk_create),
+    path("async/telemetry/", async_views.telemetry_create),
+    path("async/telemetry/bulk/", async_views.telemetry_bulk_create),
+    path("async/parking-log/", async_views.parking_log_create),
+    path("events/", async_views.event_stream),
     path("alerts/", views.alert_list),
     path("alerts/<int:pk>/acknowledge/", views.alert_acknowledge),
     path("dashboard/summary/", views.dashboard_summary),
+    path("dashboard/efficiency/", views.dashboard_efficiency),
+    path("dashboard/trend/", views.dashboard_trend),
+    path("analytics/sessions/", views.session_analytics),
+    path("analytics/energy/", views.energy_analytics),
     path("devices/status/", views.device_status_list),
+    path("devices/status/changes/", views.device_status_changes),
+    path("devices/<str:code>/telemetry/", views.device_telemetry),
+    path("occupancy/", views.occupancy),
     path("targets/", views.target_list),
     path("targets/<int:pk>/", views.target_update),
     path("report-csv/", views.reports_usage),
     path("report-csv", views.reports_usage),
     path("reports/usage/", views.reports_usage),
     path("reports/usage", views.reports_usage),
+    path("reports/jobs/", views.report_job_create),
+    path("reports/jobs/<int:pk>/", views.report_job_detail),
+    path("reports/jobs/<int:pk>/download/", views.report_job_download),
 ]
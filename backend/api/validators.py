@@ -0,0 +1,176 @@
+"""
+Fast-path telemetry validation for the ingestion hot paths.
+
+Accepts and rejects exactly what TelemetryBulkItemSerializer (and, with
+check_device, TelemetrySerializer) does, with the same error messages, but
+without building a DRF serializer per record. The clock for the future-timestamp
+rule is read once per TelemetryValidator, i.e. once per batch, and well-formed
+ISO-8601 timestamps go through datetime.fromisoformat. Anything unusual (non-dict
+records, timestamps that fail the fast path) is handed to the serializer code so
+messages stay identical.
+"""
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+from rest_framework import serializers
+
+from .registry import registry
+from .serializers import TelemetryBulkItemSerializer, TelemetrySerializer, parse_timestamp
+
+DEVICE_CODE_MAX_LENGTH = 128
+FLOAT_MAX_STRING_LENGTH = 1000  # DRF FloatField.MAX_STRING_LENGTH
+
+MSG_REQUIRED = "This field is required."
+MSG_NULL = "This field may not be null."
+MSG_BLANK = "This field may not be blank."
+MSG_NOT_STRING = "Not a valid string."
+MSG_NULL_CHARACTERS = "Null characters are not allowed."
+MSG_SURROGATE = "Surrogate characters are not allowed: U+{code_point:X}."
+MSG_INVALID_NUMBER = "A valid number is required."
+MSG_NUMBER_STRING_TOO_LARGE = "String value too large."
+MSG_NUMBER_OVERFLOW = "Integer value too large to convert to float"
+MSG_MIN_VALUE = "Ensure this value is greater than or equal to {limit}."
+MSG_MAX_VALUE = "Ensure this value is less than or equal to {limit}."
+MSG_DEVICE_NOT_FOUND = "Device not found."
+
+# (field, min_value, max_value), as declared on TelemetrySerializer
+FLOAT_FIELDS = (
+    ("voltage", 0, None),
+    ("current", 0, None),
+    ("power_factor", 0, 1),
+)
+
+_missing = object()
+
+
+def _string_field(item, name, max_length=None):
+    """CharField semantics: returns (value, errors)."""
+    value = item.get(name, _missing)
+    if value is _missing:
+        return None, [MSG_REQUIRED]
+    if value is None:
+        return None, [MSG_NULL]
+    if value == "" or str(value).strip() == "":
+        return None, [MSG_BLANK]
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        return None, [MSG_NOT_STRING]
+    value = str(value).strip()
+    errors = []
+    if max_length is not None and len(value) > max_length:
+        errors.append(f"Ensure this field has no more than {max_length} characters.")
+    if "\x00" in value:
+        errors.append(MSG_NULL_CHARACTERS)
+    for ch in value:
+        if 0xD800 <= ord(ch) <= 0xDFFF:
+            errors.append(MSG_SURROGATE.format(code_point=ord(ch)))
+            break
+    return value, errors
+
+
+def _float_field(item, name, min_value, max_value):
+    """FloatField(min_value, max_value) semantics: returns (value, errors)."""
+    value = item.get(name, _missing)
+    if value is _missing:
+        return None, [MSG_REQUIRED]
+    if value is None:
+        return None, [MSG_NULL]
+    if isinstance(value, str) and len(value) > FLOAT_MAX_STRING_LENGTH:
+        return None, [MSG_NUMBER_STRING_TOO_LARGE]
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None, [MSG_INVALID_NUMBER]
+    except OverflowError:
+        return None, [MSG_NUMBER_OVERFLOW]
+    errors = []
+    if max_value is not None and value > max_value:
+        errors.append(MSG_MAX_VALUE.format(limit=max_value))
+    if min_value is not None and value < min_value:
+        errors.append(MSG_MIN_VALUE.format(limit=min_value))
+    return value, errors
+
+
+class TelemetryValidator:
+    """Validate telemetry records against one clock reading. Create one per batch."""
+
+    def __init__(self, now=None, check_device=False):
+        self.now = now or timezone.now()
+        self.future_limit = self.now + timedelta(minutes=1)
+        self.check_device = check_device
+        self.tz = timezone.get_current_timezone()
+        self.tz_is_utc = self.tz.utcoffset(None) == timedelta(0) and getattr(
+            self.tz, "key", "UTC"
+        ) in ("UTC", "Etc/UTC")
+
+    def _timestamp(self, value):
+        """Returns (datetime, errors); the slow path supplies the serializer's messages."""
+        try:
+            dt = datetime.fromisoformat(value)
+        except ValueError:
+            dt = None
+        if dt is not None:
+            try:
+                if dt.tzinfo is not None:
+                    dt = dt.astimezone(self.tz)
+                elif self.tz_is_utc:
+                    dt = dt.replace(tzinfo=self.tz)
+                else:
+                    dt = None
+            except OverflowError:
+                dt = None
+        if dt is not None and dt <= self.future_limit:
+            return dt, []
+        try:
+            return parse_timestamp(value, now=self.now), []
+        except serializers.ValidationError as e:
+            return None, [str(message) for message in e.detail]
+
+    def validate(self, item):
+        """Return (validated_data, None) or (None, errors) like serializer.validated_data / .errors."""
+        if not isinstance(item, Mapping):
+            ser_class = TelemetrySerializer if self.check_device else TelemetryBulkItemSerializer
+            ser = ser_class(data=item)
+            ser.is_valid()
+            return None, ser.errors
+
+        errors = {}
+        data = {}
+        code, field_errors = _string_field(item, "device_code", DEVICE_CODE_MAX_LENGTH)
+        if not field_errors and self.check_device and registry.get(code) is None:
+            field_errors = [MSG_DEVICE_NOT_FOUND]
+        if field_errors:
+            errors["device_code"] = field_errors
+        else:
+            data["device_code"] = code
+
+        for name, min_value, max_value in FLOAT_FIELDS:
+            value, field_errors = _float_field(item, name, min_value, max_value)
+            if field_errors:
+                errors[name] = field_errors
+            else:
+                data[name] = value
+
+        raw_ts, field_errors = _string_field(item, "timestamp")
+        if not field_errors:
+            ts, field_errors = self._timestamp(raw_ts)
+        if field_errors:
+            errors["timestamp"] = field_errors
+        else:
+            data["timestamp"] = ts
+
+        if errors:
+            return None, errors
+        return data, None
+
+    def validate_many(self, records, start=0):
+        """Validate a sequence; returns ([(index, data)], [{"index", "errors"}])."""
+        items = []
+        errors = []
+        for i, item in enumerate(records, start):
+            data, item_errors = self.validate(item)
+            if item_errors:
+                errors.append({"index": i, "errors": item_errors})
+            else:
+                items.append((i, data))
+        return items, errors
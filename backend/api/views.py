@@ -1,128 +1,261 @@
-from datetime import datetime
+import hashlib
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
-from django.db.models import Count, Max, Min, Q
-from django.http import HttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.db.models import Count, Exists, Min, OuterRef, Q, Sum
+from django.db.models.functions import TruncDate
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from rest_framework import status
 
-from .models import Device, Telemetry, ParkingLog, Alert, Target, ParkingZone, ParkingFacility
+from .models import (
+    Device,
+    DeviceLastSeen,
+    DeviceOccupancy,
+    Telemetry,
+    ParkingLog,
+    ParkingHourlyRollup,
+    Alert,
+    Target,
+    ParkingZone,
+    ParkingFacility,
+    ZoneOccupancy,
+    ReportJob,
+)
 from .serializers import (
-    TelemetrySerializer,
-    TelemetryBulkItemSerializer,
     ParkingLogSerializer,
+    ParkingLogBulkItemSerializer,
     TargetSerializer,
 )
+from . import analytics, energy, report_jobs, reports, timeseries
+from .dashboard_cache import cached_summary, touch_timestamps
+from .changes import changed_device_ids, current_version, make_cursor, parse_cursor
+from .registry import registry
+from .state import LAST_TELEMETRY, record_parking_logs, touch_last_seen
+from .validators import TelemetryValidator
+from .ingestion import ingest_telemetry_batch, ingest_parking_log_batch
+from .write_behind import BACKPRESSURE_SYNC, get_write_buffer
 from .services import (
     check_telemetry_alerts,
     acknowledge_offline_alerts_for_device,
-    compute_health_score,
+    HEALTH_OFFLINE_MINUTES,
+    compute_health_scores,
 )
 
 
 @api_view(["GET"])
 def health(request):
-    return Response({"status": "ok"})
+    data = {"status": "ok"}
+    buffer = get_write_buffer()
+    if buffer is not None:
+        data["write_behind"] = buffer.stats()
+    return Response(data)
 
 
-@api_view(["POST"])
-def telemetry_create(request):
-    """POST /api/telemetry/ - single telemetry ingestion."""
-    ser = TelemetrySerializer(data=request.data)
-    if not ser.is_valid():
-        return Response(ser.errors, status=status.HTTP_400_BAD_REQUEST)
-    data = ser.validated_data
-    device = Device.objects.get(code=data["device_code"])
+def _telemetry_create(payload):
+    """Single telemetry ingestion; shared by the DRF and async views. Returns (body, status)."""
+    data, errors = TelemetryValidator(check_device=True).validate(payload)
+    if errors:
+        return errors, status.HTTP_400_BAD_REQUEST
+    device = registry.get(data["device_code"]).as_device()
     ts = data["timestamp"]
     if Telemetry.objects.filter(device=device, timestamp=ts).exists():
-        return Response(
+        return (
             {"detail": "Duplicate telemetry for this device and timestamp."},
-            status=status.HTTP_409_CONFLICT,
+            status.HTTP_409_CONFLICT,
         )
-    obj = Telemetry.objects.create(
-        device=device,
-        voltage=data["voltage"],
-        current=data["current"],
-        power_factor=data["power_factor"],
-        timestamp=ts,
-    )
+    buffer = get_write_buffer()
+    if buffer is not None:
+        if buffer.submit(data):
+            return (
+                {"device_code": device.code, "timestamp": ts.isoformat(), "queued": True},
+                status.HTTP_202_ACCEPTED,
+            )
+        if buffer.backpressure != BACKPRESSURE_SYNC:
+            return (
+                {"detail": "Ingestion queue is full, retry later."},
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+    with transaction.atomic():
+        obj = Telemetry.objects.create(
+            device=device,
+            voltage=data["voltage"],
+            current=data["current"],
+            power_factor=data["power_factor"],
+            timestamp=ts,
+        )
+        touch_last_seen(LAST_TELEMETRY, {device.pk: ts})
+        touch_timestamps([ts])
     acknowledge_offline_alerts_for_device(device)
     check_telemetry_alerts(device, data["voltage"], data["current"])
-    return Response(
+    return (
         {"id": obj.pk, "device_code": device.code, "timestamp": ts.isoformat()},
-        status=status.HTTP_201_CREATED,
+        status.HTTP_201_CREATED,
     )
 
 
+def _telemetry_bulk_create(payload):
+    """Bulk telemetry ingestion; shared by the DRF and async views. Returns (body, status)."""
+    if not isinstance(payload, list):
+        return (
+            {"detail": "Expected a list of telemetry records."},
+            status.HTTP_400_BAD_REQUEST,
+        )
+    items, errors = TelemetryValidator().validate_many(payload)
+    created, batch_errors = ingest_telemetry_batch(items)
+    errors.extend(batch_errors)
+    errors.sort(key=lambda e: e["index"])
+    return {"created": created, "errors": errors}, status.HTTP_201_CREATED
+
+
+@api_view(["POST"])
+def telemetry_create(request):
+    """
+    POST /api/telemetry/ - single telemetry ingestion.
+    With TELEMETRY_WRITE_BEHIND enabled the reading is queued and 202 returned instead of 201.
+    """
+    body, code = _telemetry_create(request.data)
+    return Response(body, status=code)
+
+
 @api_view(["POST"])
 def telemetry_bulk_create(request):
     """POST /api/telemetry/bulk/ - bulk telemetry; partial success: insert valid, return errors."""
-    if not isinstance(request.data, list):
+    body, code = _telemetry_bulk_create(request.data)
+    return Response(body, status=code)
+
+
+@api_view(["POST"])
+def telemetry_ndjson_create(request):
+    """
+    POST /api/telemetry/ndjson/ - newline-delimited JSON telemetry, one record per line.
+    The body is read line by line and committed every NDJSON_INGEST_CHUNK_SIZE valid rows,
+    so memory does not grow with upload size. Errors carry 1-based line numbers.
+    """
+    if request.content_type.split(";")[0].strip() != "application/x-ndjson":
         return Response(
-            {"detail": "Expected a list of telemetry records."},
-            status=status.HTTP_400_BAD_REQUEST,
+            {"detail": "Expected Content-Type application/x-ndjson."},
+            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
         )
-    to_create = []
+    chunk_size = settings.NDJSON_INGEST_CHUNK_SIZE
+    max_line = settings.NDJSON_INGEST_MAX_LINE_BYTES
+    max_errors = settings.NDJSON_INGEST_MAX_ERRORS
+    stream = request.stream
+
+    lines = 0
+    created = 0
+    error_count = 0
     errors = []
-    seen = set()  # (device_code, timestamp key) for duplicate in request
+    chunk = []
+    validator = TelemetryValidator()
 
-    for i, item in enumerate(request.data):
-        ser = TelemetryBulkItemSerializer(data=item)
-        if not ser.is_valid():
-            errors.append({"index": i, "errors": ser.errors})
+    def add_errors(batch_errors):
+        nonlocal error_count
+        error_count += len(batch_errors)
+        room = max_errors - len(errors)
+        if room > 0:
+            errors.extend(
+                {"line": e["index"], "errors": e["errors"]} for e in batch_errors[:room]
+            )
+
+    def flush():
+        nonlocal created
+        n, batch_errors = ingest_telemetry_batch(chunk)
+        created += n
+        add_errors(batch_errors)
+        chunk.clear()
+
+    while stream is not None:
+        line = stream.readline(max_line + 1)
+        if not line:
+            break
+        lines += 1
+        if len(line) > max_line and not line.endswith(b"\n"):
+            while line and not line.endswith(b"\n"):  # skip the rest of an oversized line
+                line = stream.readline(max_line + 1)
+            add_errors([{"index": lines, "errors": {"non_field_errors": ["Line too long."]}}])
             continue
-        data = ser.validated_data
-        try:
-            device = Device.objects.get(code=data["device_code"])
-        except Device.DoesNotExist:
-            errors.append({"index": i, "errors": {"device_code": ["Device not found."]}})
+        line = line.strip()
+        if not line:
             continue
-        ts = data["timestamp"]
-        key = (device.code, ts.isoformat())
-        if key in seen:
-            errors.append({"index": i, "errors": {"timestamp": ["Duplicate in request."]}})
+        try:
+            item = json.loads(line)
+        except ValueError:
+            add_errors([{"index": lines, "errors": {"non_field_errors": ["Invalid JSON."]}}])
             continue
-        if Telemetry.objects.filter(device=device, timestamp=ts).exists():
-            errors.append({"index": i, "errors": {"timestamp": ["Duplicate in database."]}})
+        data, item_errors = validator.validate(item)
+        if item_errors:
+            add_errors([{"index": lines, "errors": item_errors}])
             continue
-        seen.add(key)
-        to_create.append(
-            Telemetry(
-                device=device,
-                voltage=data["voltage"],
-                current=data["current"],
-                power_factor=data["power_factor"],
-                timestamp=ts,
-            )
-        )
-
-    if to_create:
-        Telemetry.objects.bulk_create(to_create)
-        for obj in to_create:
-            acknowledge_offline_alerts_for_device(obj.device)
-            check_telemetry_alerts(obj.device, obj.voltage, obj.current)
+        chunk.append((lines, data))
+        if len(chunk) >= chunk_size:
+            flush()
+            validator = TelemetryValidator()
+    if chunk:
+        flush()
+    errors.sort(key=lambda e: e["line"])
 
     return Response(
-        {"created": len(to_create), "errors": errors},
+        {"lines": lines, "created": created, "error_count": error_count, "errors": errors},
         status=status.HTTP_201_CREATED,
     )
 
 
+def _parking_log_create(payload):
+    """Single occupancy event ingestion; shared by the DRF and async views. Returns (body, status)."""
+    ser = ParkingLogSerializer(data=payload)
+    if not ser.is_valid():
+        return ser.errors, status.HTTP_400_BAD_REQUEST
+    data = ser.validated_data
+    device = registry.get(data["device_code"]).as_device()
+    with transaction.atomic():
+        log = ParkingLog.objects.create(
+            device=device,
+            is_occupied=data["is_occupied"],
+            timestamp=data["timestamp"],
+        )
+        record_parking_logs([log])
+    return {"detail": "Parking log created."}, status.HTTP_201_CREATED
+
+
 @api_view(["POST"])
 def parking_log_create(request):
     """POST /api/parking-log/ - occupancy event ingestion."""
-    ser = ParkingLogSerializer(data=request.data)
-    if not ser.is_valid():
-        return Response(ser.errors, status=status.HTTP_400_BAD_REQUEST)
-    data = ser.validated_data
-    device = Device.objects.get(code=data["device_code"])
-    ParkingLog.objects.create(
-        device=device,
-        is_occupied=data["is_occupied"],
-        timestamp=data["timestamp"],
-    )
+    body, code = _parking_log_create(request.data)
+    return Response(body, status=code)
+
+
+@api_view(["POST"])
+def parking_log_bulk_create(request):
+    """POST /api/parking-log/bulk/ - bulk occupancy events; partial success: insert valid, return errors."""
+    if not isinstance(request.data, list):
+        return Response(
+            {"detail": "Expected a list of parking log records."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    items = []
+    errors = []
+    for i, item in enumerate(request.data):
+        ser = ParkingLogBulkItemSerializer(data=item)
+        if not ser.is_valid():
+            errors.append({"index": i, "errors": ser.errors})
+            continue
+        items.append((i, ser.validated_data))
+
+    created, batch_errors = ingest_parking_log_batch(items)
+    errors.extend(batch_errors)
+    errors.sort(key=lambda e: e["index"])
+
     return Response(
-        {"detail": "Parking log created."},
+        {"created": created, "errors": errors},
         status=status.HTTP_201_CREATED,
     )
 
@@ -182,50 +315,142 @@ def _parse_date(s):
         return None
 
 
-@api_view(["GET"])
-def dashboard_summary(request):
-    """GET /api/dashboard/summary/?date=YYYY-MM-DD"""
-    date_str = request.query_params.get("date")
-    if not date_str:
-        return Response(
-            {"detail": "Query parameter 'date' (YYYY-MM-DD) is required."},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-    day = _parse_date(date_str)
-    if day is None:
-        return Response(
-            {"detail": "Invalid date. Use YYYY-MM-DD."},
-            status=status.HTTP_400_BAD_REQUEST,
+def _target_efficiency(date_from, date_to, facility_id=None, zone_id=None):
+    """
+    Target vs actual (parking events) per day in [date_from, date_to], optionally
+    limited to targets in a facility / zone, as
+    {date: {"efficiency_pct", "target_actual_comparison", "zone_breakdown"}}.
+    Two queries whatever the number of targets: the targets, and one rollup
+    aggregation per (device, zone, day) that zone and device targets are summed from.
+    """
+    targets = Target.objects.filter(date__gte=date_from, date__lte=date_to)
+    if facility_id is not None:
+        targets = targets.filter(Q(zone__facility_id=facility_id) | Q(device__zone__facility_id=facility_id))
+    if zone_id is not None:
+        targets = targets.filter(Q(zone_id=zone_id) | Q(device__zone_id=zone_id))
+    targets = list(
+        targets.select_related("zone", "device")
+        .order_by("date", "id")
+    )
+    zone_ids = {t.zone_id for t in targets if t.zone_id}
+    device_ids = {t.device_id for t in targets if not t.zone_id}
+    zone_actual = defaultdict(int)  # (zone_id, date) -> events
+    device_actual = defaultdict(int)  # (device_id, date) -> events
+    if targets:
+        start = timezone.make_aware(datetime.combine(date_from, datetime.min.time()))
+        end = timezone.make_aware(datetime.combine(date_to, datetime.max.time()))
+        rows = (
+            ParkingHourlyRollup.objects.filter(hour__gte=start, hour__lte=end)
+            .filter(Q(device__zone_id__in=zone_ids) | Q(device_id__in=device_ids))
+            .values("device_id", "device__zone_id", day=TruncDate("hour"))
+            .annotate(n=Sum("event_count"))
+            .values_list("device_id", "device__zone_id", "day", "n")
         )
+        for device_id, zone_id, d, n in rows:
+            zone_actual[(zone_id, d)] += n
+            device_actual[(device_id, d)] += n
+
+    days = {}
+    d = date_from
+    while d <= date_to:
+        days[d] = {"target": 0.0, "actual": 0.0, "zone_breakdown": []}
+        d += timedelta(days=1)
+    for t in targets:
+        day = days[t.date]
+        if t.zone_id:
+            actual = zone_actual[(t.zone_id, t.date)]
+            entry = {"zone_code": t.zone.code}
+        else:
+            actual = device_actual[(t.device_id, t.date)]
+            entry = {"device_code": t.device.code}
+        entry.update({
+            "target": t.target_value,
+            "actual": actual,
+            "efficiency_pct": min(100, (actual / t.target_value * 100)) if t.target_value else 0,
+        })
+        day["target"] += t.target_value
+        day["actual"] += actual
+        day["zone_breakdown"].append(entry)
+
+    result = {}
+    for d, day in days.items():
+        total_target, total_actual = day["target"], day["actual"]
+        result[d] = {
+            "efficiency_pct": round(total_actual / total_target * 100, 1) if total_target else None,
+            "target_actual_comparison": {"target": total_target, "actual": total_actual} if total_target else None,
+            "zone_breakdown": day["zone_breakdown"],
+        }
+    return result
+
+
+def _scope_params(request):
+    """Optional integer facility / zone query params; returns (facility_id, zone_id, error_response)."""
+    ids = []
+    for name in ("facility", "zone"):
+        raw = request.query_params.get(name)
+        if not raw:
+            ids.append(None)
+            continue
+        try:
+            ids.append(int(raw))
+        except ValueError:
+            return None, None, Response(
+                {"detail": f"Invalid {name}. Use a numeric id."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+    return ids[0], ids[1], None
+
+
+def _device_scope(facility_id, zone_id, prefix="device__"):
+    """Filter kwargs restricting a device-related queryset to a facility and/or zone."""
+    scope = {}
+    if facility_id is not None:
+        scope[f"{prefix}zone__facility_id"] = facility_id
+    if zone_id is not None:
+        scope[f"{prefix}zone_id"] = zone_id
+    return scope
+
+
+def _dashboard_summary(day, facility_id=None, zone_id=None):
     start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
     end = timezone.make_aware(datetime.combine(day, datetime.max.time()))
+    scope = _device_scope(facility_id, zone_id)
 
-    total_parking_events = ParkingLog.objects.filter(
-        timestamp__gte=start, timestamp__lte=end
-    ).count()
+    # Event counts come from the hourly rollups (day boundaries are whole hours)
+    day_rollups = ParkingHourlyRollup.objects.filter(hour__gte=start, hour__lte=end, **scope)
+    total_parking_events = day_rollups.aggregate(n=Sum("event_count"))["n"] or 0
 
     # Current occupancy: latest log per device on that date; count is_occupied
-    latest_per_device = (
-        ParkingLog.objects.filter(timestamp__gte=start, timestamp__lte=end)
-        .values("device_id")
-        .annotate(last_ts=Max("timestamp"))
-    )
-    occupied_count = 0
-    for row in latest_per_device:
-        log = ParkingLog.objects.filter(
-            device_id=row["device_id"], timestamp=row["last_ts"]
-        ).first()
-        if log and log.is_occupied:
-            occupied_count += 1
+    if day >= timezone.localdate():
+        # Nothing is logged after today, so each device's latest event is in DeviceOccupancy
+        occupied_count = DeviceOccupancy.objects.filter(
+            is_occupied=True, last_event_at__gte=start, last_event_at__lte=end, **scope
+        ).count()
+    else:
+        later_that_day = ParkingLog.objects.filter(
+            device_id=OuterRef("device_id"),
+            timestamp__gt=OuterRef("timestamp"),
+            timestamp__lte=end,
+        )
+        occupied_count = (
+            ParkingLog.objects.filter(
+                timestamp__gte=start, timestamp__lte=end, is_occupied=True, **scope
+            )
+            .filter(~Exists(later_that_day))
+            .order_by()
+            .values("device_id")
+            .distinct()
+            .count()
+        )
 
     # Active devices: sent telemetry or parking log on that date
     telemetry_devices = set(
-        Telemetry.objects.filter(timestamp__gte=start, timestamp__lte=end)
+        Telemetry.objects.filter(timestamp__gte=start, timestamp__lte=end, **scope)
         .values_list("device_id", flat=True)
         .distinct()
     )
     log_devices = set(
-        ParkingLog.objects.filter(timestamp__gte=start, timestamp__lte=end)
+        ParkingLog.objects.filter(timestamp__gte=start, timestamp__lte=end, **scope)
         .values_list("device_id", flat=True)
         .distinct()
     )
@@ -233,73 +458,291 @@ def dashboard_summary(request):
 
     # Alerts triggered (created on that date)
     alerts_triggered = Alert.objects.filter(
-        created_at__gte=start, created_at__lte=end
+        created_at__gte=start, created_at__lte=end, **scope
     ).count()
 
     # Hourly usage: count of parking log events per hour
-    from django.db.models.functions import TruncHour
     hourly = (
-        ParkingLog.objects.filter(timestamp__gte=start, timestamp__lte=end)
-        .annotate(hour=TruncHour("timestamp"))
+        day_rollups.filter(event_count__gt=0)
         .values("hour")
-        .annotate(count=Count("id"))
+        .annotate(count=Sum("event_count"))
         .order_by("hour")
     )
-    hourly_usage = [{"hour": h["hour"].isoformat() if h["hour"] else None, "count": h["count"]} for h in hourly]
+    hourly_usage = [
+        {"hour": timezone.localtime(h["hour"]).isoformat(), "count": h["count"]} for h in hourly
+    ]
 
     # Targets and efficiency for this date
-    targets = Target.objects.filter(date=day).select_related("zone", "device")
-    total_target = 0.0
-    total_actual = 0.0
-    zone_breakdown = []
-    for t in targets:
-        if t.zone_id:
-            devices_in_zone = Device.objects.filter(zone=t.zone)
-            actual = ParkingLog.objects.filter(
-                device__zone=t.zone,
-                timestamp__gte=start,
-                timestamp__lte=end,
-            ).count()
-            total_target += t.target_value
-            total_actual += actual
-            zone_breakdown.append({
-                "zone_code": t.zone.code,
-                "target": t.target_value,
-                "actual": actual,
-                "efficiency_pct": min(100, (actual / t.target_value * 100)) if t.target_value else 0,
-            })
-        else:
-            actual = ParkingLog.objects.filter(
-                device=t.device,
-                timestamp__gte=start,
-                timestamp__lte=end,
-            ).count()
-            total_target += t.target_value
-            total_actual += actual
-            zone_breakdown.append({
-                "device_code": t.device.code,
-                "target": t.target_value,
-                "actual": actual,
-                "efficiency_pct": min(100, (actual / t.target_value * 100)) if t.target_value else 0,
-            })
-    efficiency_pct = (total_actual / total_target * 100) if total_target else None
+    efficiency = _target_efficiency(day, day, facility_id, zone_id)[day]
 
-    return Response({
-        "date": date_str,
+    return {
+        "date": day.isoformat(),
         "total_parking_events": total_parking_events,
         "current_occupancy_count": occupied_count,
         "active_devices_count": active_devices_count,
         "alerts_triggered": alerts_triggered,
         "hourly_usage": hourly_usage,
-        "efficiency_pct": round(efficiency_pct, 1) if efficiency_pct is not None else None,
-        "target_actual_comparison": {"target": total_target, "actual": total_actual} if total_target else None,
-        "zone_breakdown": zone_breakdown,
+        "efficiency_pct": efficiency["efficiency_pct"],
+        "target_actual_comparison": efficiency["target_actual_comparison"],
+        "zone_breakdown": efficiency["zone_breakdown"],
+    }
+
+
+@api_view(["GET"])
+def dashboard_summary(request):
+    """
+    GET /api/dashboard/summary/?date=YYYY-MM-DD&facility=...&zone=...
+    Closed days are served from the dashboard cache. Responses carry an ETag (and
+    Last-Modified for closed days); matching If-None-Match / If-Modified-Since get 304.
+    """
+    date_str = request.query_params.get("date")
+    if not date_str:
+        return Response(
+            {"detail": "Query parameter 'date' (YYYY-MM-DD) is required."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    day = _parse_date(date_str)
+    if day is None:
+        return Response(
+            {"detail": "Invalid date. Use YYYY-MM-DD."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    facility_id, zone_id, error = _scope_params(request)
+    if error:
+        return error
+
+    last_modified = None
+    if day < timezone.localdate():
+        body, etag, last_modified = cached_summary(
+            day, (facility_id, zone_id), lambda: _dashboard_summary(day, facility_id, zone_id)
+        )
+    else:
+        body = _dashboard_summary(day, facility_id, zone_id)
+        digest = hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest()[:20]
+        etag = f'"{digest}"'
+
+    response = Response({**body, "date": date_str})
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    if last_modified is not None:
+        last_modified = int(last_modified.timestamp())
+        response["Last-Modified"] = http_date(last_modified)
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified, response=response
+    )
+
+
+DASHBOARD_RANGE_MAX_DAYS = 366
+
+
+def _date_range_params(request):
+    """Required date_from / date_to query params; returns (date_from, date_to, error_response)."""
+    date_from = _parse_date(request.query_params.get("date_from"))
+    date_to = _parse_date(request.query_params.get("date_to"))
+    if not date_from or not date_to:
+        return None, None, Response(
+            {"detail": "Query parameters 'date_from' and 'date_to' (YYYY-MM-DD) are required."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if date_from > date_to:
+        date_from, date_to = date_to, date_from
+    if (date_to - date_from).days >= DASHBOARD_RANGE_MAX_DAYS:
+        return None, None, Response(
+            {"detail": f"Date range is limited to {DASHBOARD_RANGE_MAX_DAYS} days."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return date_from, date_to, None
+
+
+@api_view(["GET"])
+def dashboard_efficiency(request):
+    """GET /api/dashboard/efficiency/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&facility=...&zone=... - target efficiency per day."""
+    date_from, date_to, error = _date_range_params(request)
+    if error:
+        return error
+    facility_id, zone_id, error = _scope_params(request)
+    if error:
+        return error
+    days = _target_efficiency(date_from, date_to, facility_id, zone_id)
+    return Response({
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "days": [{"date": d.isoformat(), **day} for d, day in days.items()],
     })
 
 
 @api_view(["GET"])
-def device_status_list(request):
-    """GET /api/devices/status/?facility=...&zone=..."""
+def dashboard_trend(request):
+    """
+    GET /api/dashboard/trend/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&facility=...&zone=...
+    Per-day and per-hour-of-day events, occupancy, active devices and alerts.
+    """
+    date_from, date_to, error = _date_range_params(request)
+    if error:
+        return error
+    facility_id, zone_id, error = _scope_params(request)
+    if error:
+        return error
+    trend = analytics.dashboard_trend(date_from, date_to, _device_scope(facility_id, zone_id))
+    return Response({
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        **trend,
+    })
+
+
+@api_view(["GET"])
+def session_analytics(request):
+    """
+    GET /api/analytics/sessions/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&facility=...&zone=...
+    Dwell time, turnover and utilisation from parking sessions (refresh_parking_sessions).
+    """
+    date_from, date_to, error = _date_range_params(request)
+    if error:
+        return error
+    facility_id, zone_id, error = _scope_params(request)
+    if error:
+        return error
+    stats = analytics.session_stats(date_from, date_to, _device_scope(facility_id, zone_id))
+    return Response({
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        **stats,
+    })
+
+
+@api_view(["GET"])
+def energy_analytics(request):
+    """
+    GET /api/analytics/energy/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&facility=...&zone=...
+    Energy (kWh), average / peak power and power factor per device, zone and facility.
+    """
+    date_from, date_to, error = _date_range_params(request)
+    if error:
+        return error
+    facility_id, zone_id, error = _scope_params(request)
+    if error:
+        return error
+    start, end = analytics._day_bounds(date_from, date_to)
+    stats = energy.energy_stats(start, end, _device_scope(facility_id, zone_id))
+    return Response({
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        **stats,
+    })
+
+
+def _parse_instant(value, end_of_day=False):
+    """ISO-8601 datetime, or YYYY-MM-DD (start of day, or its last instant with end_of_day); aware or None."""
+    try:
+        day = parse_date(value)
+        if day is not None:
+            dt = datetime.combine(day, datetime.max.time() if end_of_day else datetime.min.time())
+        else:
+            dt = parse_datetime(value)
+    except ValueError:
+        return None
+    if dt is None:
+        return None
+    return timezone.make_aware(dt) if timezone.is_naive(dt) else dt
+
+
+def _int_param(request, name, default, low, high):
+    """Integer query param within [low, high]; returns (value, error_response)."""
+    raw = request.query_params.get(name)
+    if raw in (None, ""):
+        return default, None
+    try:
+        value = int(raw)
+    except ValueError:
+        value = None
+    if value is None or not low <= value <= high:
+        return None, Response(
+            {"detail": f"'{name}' must be an integer between {low} and {high}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return value, None
+
+
+@api_view(["GET"])
+def device_telemetry(request, code):
+    """
+    GET /api/devices/<code>/telemetry/?start=...&end=...&mode=buckets|lttb|raw
+    start / end: ISO-8601 datetime or YYYY-MM-DD (default: the last 24 hours).
+    buckets (default): min / max / avg per time bucket; bucket=<seconds> overrides the automatic size.
+    lttb: points=<n> readings chosen to keep the shape of metric=power|voltage|current|power_factor.
+    raw: limit=<n> readings per page; pass the returned next cursor as after= for the following page.
+    """
+    device = registry.get(code)
+    if device is None:
+        return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+    params = request.query_params
+    end = _parse_instant(params["end"], end_of_day=True) if params.get("end") else timezone.now()
+    start = None
+    if end is not None:
+        # Default start derives from end, so only once end parsed.
+        start = _parse_instant(params["start"]) if params.get("start") else end - timedelta(hours=24)
+    if start is None or end is None:
+        return Response(
+            {"detail": "'start' and 'end' must be ISO-8601 datetimes or YYYY-MM-DD."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if start > end:
+        start, end = end, start
+    body = {"device_code": device.code, "start": start.isoformat(), "end": end.isoformat()}
+    mode = params.get("mode") or "buckets"
+    max_points = timeseries.max_points()
+
+    if mode == "buckets":
+        seconds = timeseries.choose_bucket(start, end)
+        if params.get("bucket"):
+            seconds, error = _int_param(request, "bucket", None, 1, 366 * 86400)
+            if error:
+                return error
+            if (end - start).total_seconds() / seconds > max_points:
+                seconds = None
+        if seconds is None:
+            return Response(
+                {"detail": f"Range too long for {max_points} buckets; use a larger bucket or a shorter range."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        points = timeseries.bucketed_series(device.device_id, start, end, seconds)
+        return Response({**body, "mode": mode, "bucket_seconds": seconds, "points": points})
+
+    if mode == "lttb":
+        n, error = _int_param(request, "points", min(500, max_points), 3, max_points)
+        if error:
+            return error
+        metric = params.get("metric") or "power"
+        if metric not in timeseries.METRICS:
+            return Response(
+                {"detail": f"'metric' must be one of: {', '.join(timeseries.METRICS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        points = timeseries.lttb_series(device.device_id, start, end, n, metric)
+        return Response({**body, "mode": mode, "metric": metric, "points": points})
+
+    if mode == "raw":
+        limit, error = _int_param(
+            request, "limit", 1000, 1, getattr(settings, "TELEMETRY_RAW_PAGE_MAX", 10000)
+        )
+        if error:
+            return error
+        after = None
+        if params.get("after"):
+            after = _parse_instant(params["after"])
+            if after is None:
+                return Response({"detail": "Invalid 'after' cursor."}, status=status.HTTP_400_BAD_REQUEST)
+        results, cursor = timeseries.raw_page(device.device_id, start, end, after, limit)
+        return Response({**body, "mode": mode, "results": results, "next": cursor})
+
+    return Response(
+        {"detail": "'mode' must be one of: buckets, lttb, raw."},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+def _status_devices(request):
     qs = Device.objects.select_related("zone", "zone__facility").order_by("code")
     facility_id = request.query_params.get("facility")
     if facility_id:
@@ -307,18 +750,43 @@ def device_status_list(request):
     zone_id = request.query_params.get("zone")
     if zone_id:
         qs = qs.filter(zone_id=zone_id)
+    return qs
+
 
-    last_telemetry = Telemetry.objects.values("device_id").annotate(ts=Max("timestamp"))
-    last_telemetry_map = {r["device_id"]: r["ts"] for r in last_telemetry}
-    last_log = ParkingLog.objects.values("device_id").annotate(ts=Max("timestamp"))
-    last_log_map = {r["device_id"]: r["ts"] for r in last_log}
+def _device_status_rows(qs):
+    """Status rows for a Device queryset; a constant number of queries however many devices."""
+    scope = qs.order_by().values("id")
+    last_telemetry_map = {}
+    last_log_map = {}
+    for device_id, telemetry_ts, log_ts in DeviceLastSeen.objects.filter(device__in=scope).values_list(
+        "device_id", "last_telemetry_at", "last_parking_log_at"
+    ):
+        last_telemetry_map[device_id] = telemetry_ts
+        last_log_map[device_id] = log_ts
 
-    open_alerts = Alert.objects.filter(acknowledged_at__isnull=True).values_list("device_id", flat=True)
-    critical = set(Alert.objects.filter(acknowledged_at__isnull=True, severity=Alert.SEVERITY_CRITICAL).values_list("device_id", flat=True))
-    warning = set(Alert.objects.filter(acknowledged_at__isnull=True, severity=Alert.SEVERITY_WARNING).values_list("device_id", flat=True))
+    # Open alerts per device and severity in one grouped query: status and health score.
+    open_counts = defaultdict(int)
+    critical = set()
+    warning = set()
+    for device_id, severity, n in (
+        Alert.objects.filter(acknowledged_at__isnull=True, device__in=scope)
+        .order_by()
+        .values("device_id", "severity")
+        .annotate(n=Count("id"))
+        .values_list("device_id", "severity", "n")
+    ):
+        open_counts[device_id] += n
+        if severity == Alert.SEVERITY_CRITICAL:
+            critical.add(device_id)
+        elif severity == Alert.SEVERITY_WARNING:
+            warning.add(device_id)
 
+    devices = list(qs)
+    scores = compute_health_scores(
+        [d.id for d in devices], last_telemetry=last_telemetry_map, open_counts=open_counts
+    )
     data = []
-    for d in qs:
+    for d in devices:
         status_val = "OK"
         if d.id in critical:
             status_val = "CRITICAL"
@@ -334,9 +802,94 @@ def device_status_list(request):
             "last_telemetry_at": last_telemetry_map.get(d.id).isoformat() if last_telemetry_map.get(d.id) else None,
             "last_parking_log_at": last_log_map.get(d.id).isoformat() if last_log_map.get(d.id) else None,
             "status": status_val,
-            "health_score": compute_health_score(d),
+            "health_score": scores[d.id],
         })
-    return Response(data)
+    return data
+
+
+@api_view(["GET"])
+def device_status_list(request):
+    """GET /api/devices/status/?facility=...&zone=..."""
+    return Response(_device_status_rows(_status_devices(request)))
+
+
+@api_view(["GET"])
+def device_status_changes(request):
+    """
+    GET /api/devices/status/changes/?cursor=<cursor>&facility=...&zone=...
+    Status rows of devices that changed after the cursor (all devices without one), and
+    the cursor to pass next time. since=<version> is accepted in place of a cursor.
+    Deleted devices are not reported.
+    """
+    checked_at = None
+    try:
+        if request.query_params.get("cursor"):
+            since, checked_at = parse_cursor(request.query_params["cursor"])
+        else:
+            since = int(request.query_params.get("since") or 0)
+    except (ValueError, OverflowError, OSError):
+        since = -1
+    # Read the version before the rows: anything committed later is reported again next time.
+    version = current_version()
+    now = timezone.now()
+    if since < 0 or since > version or (checked_at is not None and checked_at > now):
+        return Response(
+            {"detail": "'cursor' must be one returned by this endpoint."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    qs = _status_devices(request)
+    if since:
+        qs = qs.filter(
+            id__in=changed_device_ids(
+                since, version, timedelta(minutes=HEALTH_OFFLINE_MINUTES), checked_at, now
+            )
+        )
+    return Response({
+        "version": version,
+        "cursor": make_cursor(version, now),
+        "full": not since,
+        "devices": _device_status_rows(qs),
+    })
+
+
+@api_view(["GET"])
+def occupancy(request):
+    """GET /api/occupancy/?facility=...&zone=... - occupied and free slots per zone and facility."""
+    qs = ZoneOccupancy.objects.select_related("zone", "zone__facility").order_by(
+        "zone__facility__name", "zone__code"
+    )
+    facility_id = request.query_params.get("facility")
+    if facility_id:
+        qs = qs.filter(zone__facility_id=facility_id)
+    zone_id = request.query_params.get("zone")
+    if zone_id:
+        qs = qs.filter(zone_id=zone_id)
+
+    zones = []
+    facilities = {}
+    for row in qs:
+        zone = row.zone
+        zones.append({
+            "zone_id": zone.id,
+            "zone_code": zone.code,
+            "zone_name": zone.name,
+            "facility_id": zone.facility_id,
+            "occupied": row.occupied,
+            "free": row.free,
+            "slot_count": row.slot_count,
+            "updated_at": row.updated_at.isoformat(),
+        })
+        facility = facilities.setdefault(zone.facility_id, {
+            "facility_id": zone.facility_id,
+            "facility_name": zone.facility.name,
+            "occupied": 0,
+            "free": 0,
+            "slot_count": 0,
+        })
+        facility["occupied"] += row.occupied
+        facility["free"] += row.free
+        facility["slot_count"] += row.slot_count
+    return Response({"facilities": list(facilities.values()), "zones": zones})
 
 
 @api_view(["GET", "POST"])
@@ -413,46 +966,71 @@ def target_update(request, pk):
     })
 
 
-@api_view(["GET"])
+@require_GET
 def reports_usage(request):
-    """GET /api/reports/usage/?date_from=...&date_to=...&format=csv"""
-    date_from = _parse_date(request.query_params.get("date_from"))
-    date_to = _parse_date(request.query_params.get("date_to"))
-    if not date_from:
-        date_from = timezone.now().date()
-    if not date_to:
-        date_to = date_from
-    if date_from > date_to:
-        date_from, date_to = date_to, date_from
-    facility_id = request.query_params.get("facility")
-    zone_id = request.query_params.get("zone")
-    fmt = request.query_params.get("format", "csv").lower()
+    """
+    GET /api/reports/usage/?date_from=...&date_to=...&facility=...&zone=...&format=csv|ndjson|csv.gz|ndjson.gz
+    Plain Django view: DRF would take format= as its own renderer override.
+    """
+    return reports.usage_report_response(request)
 
-    qs = ParkingLog.objects.filter(
-        timestamp__date__gte=date_from,
-        timestamp__date__lte=date_to,
-    ).select_related("device", "device__zone", "device__zone__facility").order_by("timestamp")
-    if facility_id:
-        qs = qs.filter(device__zone__facility_id=facility_id)
-    if zone_id:
-        qs = qs.filter(device__zone_id=zone_id)
-
-    if fmt == "csv":
-        import csv
-        from io import StringIO
-        buf = StringIO()
-        w = csv.writer(buf)
-        w.writerow(["date", "device_code", "zone_code", "facility", "is_occupied", "timestamp"])
-        for log in qs:
-            w.writerow([
-                log.timestamp.date(),
-                log.device.code,
-                log.device.zone.code,
-                log.device.zone.facility.name,
-                log.is_occupied,
-                log.timestamp.isoformat(),
-            ])
-        resp = HttpResponse(buf.getvalue(), content_type="text/csv")
-        resp["Content-Disposition"] = 'attachment; filename="usage.csv"'
-        return resp
-    return Response({"detail": "Only format=csv is supported."}, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(["POST"])
+def report_job_create(request):
+    """
+    POST /api/reports/jobs/ {date_from, date_to, facility, zone, format}
+    Queues the usage report for a background worker: 202 with the new job, or 200 with
+    the job of an identical request whose data has not changed since.
+    """
+    if not isinstance(request.data, dict):
+        return Response(
+            {"detail": "Expected a JSON object with date_from, date_to, facility, zone and format."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    query = {key: str(value) for key, value in request.data.items() if value is not None}
+    fmt = (query.get("format") or "csv").lower()
+    if fmt not in reports.format_names():
+        return Response(
+            {"detail": f"format must be one of: {', '.join(reports.format_names())}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        params = reports.usage_params(query)
+    except ValueError:
+        return Response(
+            {"detail": "facility and zone must be integer ids."}, status=status.HTTP_400_BAD_REQUEST
+        )
+    job, created = report_jobs.request_job(fmt, *params)
+    return Response(
+        report_jobs.job_data(job), status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK
+    )
+
+
+@api_view(["GET"])
+def report_job_detail(request, pk):
+    """GET /api/reports/jobs/<id>/ - status and progress; download_url once done."""
+    report_jobs.sweep()  # polling moves queued and abandoned jobs on
+    job = ReportJob.objects.filter(pk=pk).first()
+    if job is None:
+        return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(report_jobs.job_data(job))
+
+
+@require_GET
+def report_job_download(request, pk):
+    """
+    GET /api/reports/jobs/<id>/download/ - the finished report; supports Range / If-Range.
+    Plain Django view so DRF content negotiation never answers a download with 406.
+    """
+    report_jobs.sweep()
+    job = ReportJob.objects.filter(pk=pk).first()
+    if job is None:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    if job.status == ReportJob.STATUS_EXPIRED:
+        return JsonResponse({"detail": "The report has expired; request it again."}, status=410)
+    if job.status != ReportJob.STATUS_DONE:
+        return JsonResponse({"detail": f"The report is {job.status}.", "status": job.status}, status=409)
+    try:
+        return report_jobs.artifact_response(request, job)
+    except FileNotFoundError:
+        return JsonResponse({"detail": "The report file is gone; request it again."}, status=410)
@@ -0,0 +1,223 @@
+"""
+Optional write-behind buffer for single telemetry POSTs (settings.TELEMETRY_WRITE_BEHIND).
+
+Validated readings go into a bounded in-process queue. A daemon thread drains it
+and group-commits up to FLUSH_ROWS rows, or whatever arrived within
+FLUSH_INTERVAL_MS, through ingest_telemetry_batch: one transaction, one fsync, and
+alert checks once per device per flush. The queue is drained at interpreter exit.
+Rows still queued when the process is killed are lost; leave it off if that matters.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections
+
+from .ingestion import ingest_telemetry_batch
+from .models import Telemetry
+
+logger = logging.getLogger(__name__)
+
+BACKPRESSURE_BLOCK = "block"  # wait up to BLOCK_TIMEOUT_MS for room, then reject
+BACKPRESSURE_REJECT = "reject"  # reject at once when full
+BACKPRESSURE_SYNC = "sync"  # caller writes the reading itself when full
+
+DEFAULTS = {
+    "ENABLED": False,
+    "MAX_QUEUE": 10000,
+    "FLUSH_ROWS": 500,
+    "FLUSH_INTERVAL_MS": 200,
+    "BACKPRESSURE": BACKPRESSURE_BLOCK,
+    "BLOCK_TIMEOUT_MS": 1000,
+}
+
+_STOP = object()
+
+
+class TelemetryWriteBuffer:
+    def __init__(self, max_queue, flush_rows, flush_interval_ms, backpressure, block_timeout_ms):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.max_queue = max_queue
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.backpressure = backpressure
+        self.block_timeout = block_timeout_ms / 1000
+        self._lock = threading.Lock()
+        self._thread = None
+        self._counters = {
+            "enqueued": 0,
+            "rejected": 0,
+            "flushes": 0,
+            "flushed_rows": 0,
+            "flush_errors": 0,
+            "duplicates_dropped": 0,
+            "failed": 0,
+            "last_flush_ms": None,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="telemetry-write-behind", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, data):
+        """
+        Queue one validated reading. Returns True if queued, False if the caller
+        must handle it: reject it, or write it inline under BACKPRESSURE_SYNC.
+        """
+        self.start()
+        try:
+            if self.backpressure == BACKPRESSURE_BLOCK:
+                self.queue.put(data, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(data)
+        except queue.Full:
+            self._count("rejected")
+            return False
+        self._count("enqueued")
+        return True
+
+    def stop(self, timeout=30):
+        """Flush everything queued so far and stop the flusher thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self.queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._counters)
+        total = data.pop("total_flush_ms")
+        data["avg_flush_ms"] = round(total / data["flushes"], 2) if data["flushes"] else None
+        data["queue_depth"] = self.queue.qsize()
+        data["max_queue"] = self.max_queue
+        data["backpressure"] = self.backpressure
+        return data
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.flush_rows:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+        # Drain whatever was queued behind the stop marker.
+        rest = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                rest.append(item)
+        for i in range(0, len(rest), self.flush_rows):
+            self._flush(rest[i:i + self.flush_rows])
+
+    def _flush(self, batch):
+        started = time.monotonic()
+        close_old_connections()
+        try:
+            created, errors = ingest_telemetry_batch(list(enumerate(batch)))
+        except Exception:
+            logger.exception(
+                "Write-behind flush of %d telemetry rows failed; retrying one at a time", len(batch)
+            )
+            self._count("flush_errors")
+            created = None
+        if created is None:
+            created, errors = self._flush_rows(batch)
+        duplicates = sum(1 for e in errors if "timestamp" in e["errors"])
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            c = self._counters
+            c["flushes"] += 1
+            c["flushed_rows"] += created
+            c["duplicates_dropped"] += duplicates
+            c["failed"] += len(errors) - duplicates
+            c["last_flush_ms"] = round(elapsed_ms, 2)
+            c["max_flush_ms"] = max(c["max_flush_ms"], round(elapsed_ms, 2))
+            c["total_flush_ms"] += elapsed_ms
+
+    def _flush_rows(self, batch):
+        """
+        Fallback after a failed group commit: insert each row in its own transaction so
+        one bad row (or a duplicate committed by another writer) costs only itself.
+        """
+        created, errors = 0, []
+        for i, data in enumerate(batch):
+            try:
+                n, row_errors = ingest_telemetry_batch([(i, data)])
+            except IntegrityError as exc:
+                # A duplicate committed elsewhere since the duplicate check, or (SQLite)
+                # a foreign key to a device deleted since the registry loaded it.
+                if Telemetry.objects.filter(
+                    device__code=data.get("device_code"), timestamp=data.get("timestamp")
+                ).exists():
+                    errors.append({"index": i, "errors": {"timestamp": ["Duplicate in database."]}})
+                    continue
+                failure = exc
+            except Exception as exc:
+                failure = exc
+            else:
+                created += n
+                errors.extend(row_errors)
+                continue
+            logger.error(
+                "Write-behind dropped telemetry for %s at %s",
+                data.get("device_code"), data.get("timestamp"), exc_info=failure,
+            )
+            errors.append({"index": i, "errors": {"non_field_errors": [str(failure)]}})
+        return created, errors
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def write_behind_settings():
+    return {**DEFAULTS, **getattr(settings, "TELEMETRY_WRITE_BEHIND", {})}
+
+
+def get_write_buffer():
+    """Process-wide buffer, or None when write-behind is disabled."""
+    global _buffer
+    conf = write_behind_settings()
+    if not conf["ENABLED"]:
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = TelemetryWriteBuffer(
+                    max_queue=conf["MAX_QUEUE"],
+                    flush_rows=conf["FLUSH_ROWS"],
+                    flush_interval_ms=conf["FLUSH_INTERVAL_MS"],
+                    backpressure=conf["BACKPRESSURE"],
+                    block_timeout_ms=conf["BLOCK_TIMEOUT_MS"],
+                )
+                atexit.register(_buffer.stop)
+    return _buffer
@@ -89,6 +89,18 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# In-memory caches are per process. With several workers use a shared backend
+# (Redis, Memcached) so dashboard invalidation reaches all of them.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -124,3 +136,97 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = "static/"
+
+
+# Ingestion
+
+# Seconds before the in-process device registry (code -> ids) is reloaded, so
+# devices changed by other workers are seen. Local changes invalidate it at once.
+DEVICE_REGISTRY_TTL_SECONDS = 60
+
+# NDJSON telemetry upload: rows committed per transaction, longest accepted line
+# in bytes, and how many per-line errors are echoed back (the rest are only counted).
+NDJSON_INGEST_CHUNK_SIZE = 1000
+NDJSON_INGEST_MAX_LINE_BYTES = 64 * 1024
+NDJSON_INGEST_MAX_ERRORS = 100
+
+# Seconds between reloads of the in-process open-alert index from the database,
+# which picks up alerts created or acknowledged by other processes.
+OPEN_ALERT_INDEX_RECONCILE_SECONDS = 5
+
+# Threads running database work for the async ingestion views (api/async/...).
+# SQLite takes one writer at a time, so more threads only add lock waits; raise
+# this on a server database.
+ASYNC_DB_THREADS = 1
+
+# Server-sent events (/api/events/, ASGI): how often the per-process publisher polls
+# the device status change feed, seconds between heartbeat comments, the client
+# reconnect delay, and how many undelivered events a client may queue before its
+# buffer is dropped and it is told to resync.
+SSE = {
+    "POLL_SECONDS": 1.0,
+    "HEARTBEAT_SECONDS": 15,
+    "RETRY_MS": 3000,
+    "CLIENT_BUFFER": 100,
+}
+
+# Write-behind for POST /api/telemetry/: readings are queued in-process and
+# group-committed by a background thread. Queued rows are lost if the process is
+# killed, so this is off by default. BACKPRESSURE when the queue is full:
+# "block" (wait BLOCK_TIMEOUT_MS, then 503), "reject" (503 at once) or "sync"
+# (write the reading inline).
+TELEMETRY_WRITE_BEHIND = {
+    "ENABLED": False,
+    "MAX_QUEUE": 10000,
+    "FLUSH_ROWS": 500,
+    "FLUSH_INTERVAL_MS": 200,
+    "BACKPRESSURE": "block",
+    "BLOCK_TIMEOUT_MS": 1000,
+}
+
+
+# Dashboard
+
+# Cache alias holding dashboard summaries of closed days, and how long an entry
+# lives (seconds). Entries are dropped early when ingestion writes into their day.
+DASHBOARD_CACHE_ALIAS = "default"
+DASHBOARD_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+# Analytics
+
+# Energy analytics (/api/analytics/energy/): telemetry rows reduced per chunk, and the
+# longest gap between two readings of a device (seconds) still integrated as energy;
+# longer gaps (device offline) count as no consumption.
+ENERGY_CHUNK_SIZE = 50000
+ENERGY_MAX_GAP_SECONDS = 300
+
+# Device telemetry series (/api/devices/<code>/telemetry/): most buckets or LTTB
+# points one response may hold, and the largest raw page.
+TELEMETRY_SERIES_MAX_POINTS = 1000
+TELEMETRY_RAW_PAGE_MAX = 10000
+
+
+# Reports
+
+# Usage report export: parking log rows fetched per database round trip, and rows
+# written per streamed chunk.
+REPORT_CHUNK_SIZE = 2000
+
+# zlib level (1-9) for gzip report downloads and gzip-encoded responses; lower is
+# faster, higher smaller (see `manage.py bench_report_formats`).
+REPORT_GZIP_LEVEL = 6
+
+# Background report jobs (/api/reports/jobs/): directory for rendered files, worker
+# threads per web process (0: run `manage.py run_report_jobs` instead), seconds a
+# finished file is kept, cache alias deduplicating identical requests, seconds
+# between progress saves, and seconds without progress after which a running job
+# counts as abandoned.
+REPORT_JOBS = {
+    "DIR": BASE_DIR / "report_artifacts",
+    "WORKERS": 1,
+    "TTL_SECONDS": 24 * 60 * 60,
+    "CACHE_ALIAS": "default",
+    "PROGRESS_SECONDS": 1.0,
+    "STALE_SECONDS": 5 * 60,
+}
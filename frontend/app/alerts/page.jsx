@@ -41,6 +41,24 @@ export default function AlertsPage() {
     load();
   }, [severity]);
 
+  // New and acknowledged alerts are pushed by the server-sent events stream.
+  useEffect(() => {
+    if (typeof EventSource === "undefined") return undefined;
+    let path = "/api/events/";
+    if (severity) path += `?severity=${encodeURIComponent(severity)}`;
+    const source = new EventSource(apiUrl(path));
+    source.addEventListener("alert", (e) => {
+      const alert = JSON.parse(e.data);
+      setAlerts((prev) => (prev.some((a) => a.id === alert.id) ? prev : [alert, ...prev]));
+    });
+    source.addEventListener("alert_acknowledged", (e) => {
+      const { id } = JSON.parse(e.data);
+      setAlerts((prev) => prev.filter((a) => a.id !== id));
+    });
+    source.addEventListener("resync", load);
+    return () => source.close();
+  }, [severity]);
+
   const acknowledge = async (id) => {
     try {
       const res = await fetch(apiUrl(`/api/alerts/${id}/acknowledge/`), {
@@ -1,7 +1,7 @@
 "use client";
 
 import { useState, useEffect, useRef } from "react";
-import { fetchJson } from "../lib/api";
+import { fetchJson, apiUrl } from "../lib/api";
 import Box from "@mui/material/Box";
 import Typography from "@mui/material/Typography";
 import TextField from "@mui/material/TextField";
@@ -30,22 +30,64 @@ export default function LivePage() {
   const [devices, setDevices] = useState([]);
   const [error, setError] = useState(null);
   const [search, setSearch] = useState("");
+  const [streaming, setStreaming] = useState(false);
   const intervalRef = useRef(null);
+  const cursorRef = useRef("");
 
+  const mergeDevices = (rows) =>
+    setDevices((prev) => {
+      if (rows.length === 0) return prev;
+      const byId = new Map(prev.map((d) => [d.id, d]));
+      rows.forEach((d) => byId.set(d.id, d));
+      return Array.from(byId.values()).sort((a, b) => (a.code < b.code ? -1 : a.code > b.code ? 1 : 0));
+    });
+
+  // First call (no cursor) returns every device; later calls only the ones that changed.
   const load = () => {
-    fetchJson("/api/devices/status/")
-      .then(setDevices)
+    fetchJson(`/api/devices/status/changes/?cursor=${encodeURIComponent(cursorRef.current)}`)
+      .then((data) => {
+        if (data.full) setDevices(data.devices);
+        else mergeDevices(data.devices);
+        cursorRef.current = data.cursor;
+      })
       .catch((e) => {
         setError(e.message);
         setDevices([]);
+        cursorRef.current = "";
       });
   };
 
+  // Server-sent events push changed devices; poll only while the stream is down.
   useEffect(() => {
+    const startPolling = () => {
+      setStreaming(false);
+      if (!intervalRef.current) intervalRef.current = setInterval(load, POLL_MS);
+    };
+    const stopPolling = () => {
+      if (intervalRef.current) clearInterval(intervalRef.current);
+      intervalRef.current = null;
+    };
     load();
-    intervalRef.current = setInterval(load, POLL_MS);
+    let source = null;
+    if (typeof EventSource !== "undefined") {
+      source = new EventSource(apiUrl("/api/events/"));
+      source.onopen = () => {
+        stopPolling();
+        setStreaming(true);
+        load(); // catch up on changes made while connecting
+      };
+      source.onerror = startPolling; // EventSource reconnects by itself
+      source.addEventListener("device", (e) => mergeDevices([JSON.parse(e.data)]));
+      source.addEventListener("resync", () => {
+        cursorRef.current = "";
+        load();
+      });
+    } else {
+      startPolling();
+    }
     return () => {
-      if (intervalRef.current) clearInterval(intervalRef.current);
+      stopPolling();
+      if (source) source.close();
     };
   }, []);
 
@@ -66,7 +108,7 @@ export default function LivePage() {
             Live monitoring
           </Typography>
           <Typography variant="body2" color="text.secondary">
-            Refreshes every 10 seconds
+            {streaming ? "Live updates" : "Refreshes every 10 seconds"}
           </Typography>
         </Box>
 
@@ -15,8 +15,16 @@ import Card from "@mui/material/Card";
 import CardContent from "@mui/material/CardContent";
 import Alert from "@mui/material/Alert";
 import Stack from "@mui/material/Stack";
+import LinearProgress from "@mui/material/LinearProgress";
 import DownloadIcon from "@mui/icons-material/Download";
 
+const FORMATS = [
+  { value: "csv", label: "CSV" },
+  { value: "csv.gz", label: "CSV, gzip" },
+  { value: "ndjson", label: "NDJSON (one JSON object per line)" },
+  { value: "ndjson.gz", label: "NDJSON, gzip" },
+];
+
 export default function ReportsPage() {
   const [facilities, setFacilities] = useState([]);
   const [zones, setZones] = useState([]);
@@ -28,7 +36,9 @@ export default function ReportsPage() {
   const [dateTo, setDateTo] = useState(() => new Date().toISOString().slice(0, 10));
   const [facilityId, setFacilityId] = useState("");
   const [zoneId, setZoneId] = useState("");
+  const [format, setFormat] = useState("csv");
   const [downloading, setDownloading] = useState(false);
+  const [progress, setProgress] = useState(null);
   const [error, setError] = useState(null);
 
   useEffect(() => {
@@ -50,29 +60,29 @@ export default function ReportsPage() {
       .catch(() => {});
   }, []);
 
-  const downloadCsv = async () => {
+  const downloadReport = async () => {
     setError(null);
     setDownloading(true);
-    const params = new URLSearchParams({
-      date_from: dateFrom,
-      date_to: dateTo,
-      format: "csv",
-    });
-    if (facilityId) params.set("facility", facilityId);
-    if (zoneId) params.set("zone", zoneId);
-    const url = apiUrl(`/report-csv/?${params}`);
+    setProgress(0);
+    const body = { date_from: dateFrom, date_to: dateTo, format };
+    if (facilityId) body.facility = facilityId;
+    if (zoneId) body.zone = zoneId;
     try {
-      const res = await fetch(url);
-      if (!res.ok) {
-        const text = await res.text();
-        throw new Error(`Download failed (${res.status}): ${text || res.statusText}`);
+      // Rendered by a background job, so long ranges do not hit request timeouts.
+      let job = await fetchJson("/api/reports/jobs/", { method: "POST", body: JSON.stringify(body) });
+      while (job.status === "queued" || job.status === "running") {
+        setProgress(job.progress);
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        job = await fetchJson(`/api/reports/jobs/${job.id}/`);
+      }
+      if (job.status !== "done") {
+        throw new Error(job.error ? `Report failed: ${job.error}` : `Report ${job.status}.`);
       }
-      const blob = await res.blob();
+      setProgress(1);
       const a = document.createElement("a");
-      a.href = URL.createObjectURL(blob);
-      a.download = "usage.csv";
+      a.href = apiUrl(job.download_url);
+      a.download = `usage.${format}`;
       a.click();
-      URL.revokeObjectURL(a.href);
     } catch (e) {
       const msg =
         e.name === "TypeError" && e.message === "Failed to fetch"
@@ -81,6 +91,7 @@ export default function ReportsPage() {
       setError(msg);
     } finally {
       setDownloading(false);
+      setProgress(null);
     }
   };
 
@@ -146,6 +157,21 @@ export default function ReportsPage() {
                   ))}
                 </Select>
               </FormControl>
+              <FormControl size="small" fullWidth>
+                <InputLabel id="format-label">Format</InputLabel>
+                <Select
+                  labelId="format-label"
+                  value={format}
+                  label="Format"
+                  onChange={(e) => setFormat(e.target.value)}
+                >
+                  {FORMATS.map((f) => (
+                    <MenuItem key={f.value} value={f.value}>
+                      {f.label}
+                    </MenuItem>
+                  ))}
+                </Select>
+              </FormControl>
               {error && (
                 <Alert severity="error" onClose={() => setError(null)}>
                   {error}
@@ -154,13 +180,16 @@ export default function ReportsPage() {
               <Button
                 variant="contained"
                 startIcon={<DownloadIcon />}
-                onClick={downloadCsv}
+                onClick={downloadReport}
                 disabled={downloading}
               >
-                {downloading ? "Downloading…" : "Download CSV"}
+                {downloading ? `Preparing… ${Math.round((progress || 0) * 100)}%` : "Download"}
               </Button>
+              {downloading && <LinearProgress variant="determinate" value={(progress || 0) * 100} />}
               <Typography variant="body2" color="text.secondary">
-                CSV only.
+                The report is prepared on the server, then downloaded; the file is kept for a day,
+                and the same request reuses it while the data is unchanged. The gzip formats save
+                a compressed file.
               </Typography>
             </Stack>
           </CardContent>